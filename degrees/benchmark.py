@@ -0,0 +1,206 @@
+import random
+import sys
+import time
+import tracemalloc
+
+import degrees
+from graph import Graph
+from util import Node, QueueFrontier, IndexedQueueFrontier
+
+# Number of random (source, target) pairs to search for
+QUERIES = 100
+
+# Largest frontier size to grow in the frontier microbenchmark
+FRONTIER_SIZE = 2 ** 21
+
+# The list-backed frontiers are quadratic, so stop timing them past this size
+LIST_FRONTIER_LIMIT = 2 ** 14
+
+# Number of remove/contains_state/add cycles timed at every frontier size
+EXPANSIONS = 10000
+
+
+def main():
+    usage = ("Usage: python benchmark.py search|graph [directory] [queries] | frontier [size]"
+             " | load directory [min_year] [max_year]")
+    if len(sys.argv) < 2 or sys.argv[1] not in ("search", "graph", "frontier", "load"):
+        sys.exit(usage)
+
+    if sys.argv[1] == "load":
+        if len(sys.argv) not in (3, 4, 5):
+            sys.exit(usage)
+        years = [int(year) if year != "-" else None for year in sys.argv[3:]]
+        benchmark_load(sys.argv[2], *years)
+        return
+
+    if sys.argv[1] == "frontier":
+        if len(sys.argv) > 3:
+            sys.exit(usage)
+        benchmark_frontiers(int(sys.argv[2]) if len(sys.argv) == 3 else FRONTIER_SIZE)
+        return
+
+    if len(sys.argv) > 4:
+        sys.exit(usage)
+    directory = sys.argv[2] if len(sys.argv) > 2 else "large"
+    queries = int(sys.argv[3]) if len(sys.argv) > 3 else QUERIES
+
+    if sys.argv[1] == "graph":
+        benchmark_graph(directory, queries)
+        return
+
+    print("Loading data...")
+    degrees.load_data(directory)
+    print("Data loaded.")
+
+    pairs = random_pairs(queries)
+    results = {}
+    for name, search in [
+        ("bfs", degrees.shortest_path),
+        ("bidirectional", degrees.shortest_path_bidirectional),
+    ]:
+        results[name] = benchmark_search(search, pairs)
+
+    # Both searches must agree on the degrees of separation for every pair
+    for i, (source, target) in enumerate(pairs):
+        lengths = {name: results[name]["lengths"][i] for name in results}
+        if len(set(lengths.values())) != 1:
+            sys.exit(f"Mismatch for {source} -> {target}: {lengths}")
+
+    print(f"{'search':<15}{'expanded':>12}{'seconds':>12}{'ms/query':>12}")
+    for name, result in results.items():
+        per_query = 1000 * result["seconds"] / len(pairs)
+        print(f"{name:<15}{result['expanded']:>12}{result['seconds']:>12.3f}{per_query:>12.3f}")
+
+
+def random_pairs(n, seed=0):
+    """
+    Returns `n` random (source_id, target_id) pairs of people
+    who starred in at least one movie.
+    """
+    rng = random.Random(seed)
+    cast = sorted(person_id for person_id in degrees.people if degrees.people[person_id]["movies"])
+    return [(rng.choice(cast), rng.choice(cast)) for _ in range(n)]
+
+
+def benchmark_search(search, pairs):
+    """
+    Runs `search` on every pair and returns the number of expanded people
+    (calls to `neighbors_for_person`), the wall time, and the path length
+    for each pair (None if not connected).
+    """
+    expanded = 0
+    neighbors_for_person = degrees.neighbors_for_person
+
+    def counting_neighbors(person_id):
+        nonlocal expanded
+        expanded += 1
+        return neighbors_for_person(person_id)
+
+    lengths = []
+    degrees.neighbors_for_person = counting_neighbors
+    try:
+        start = time.perf_counter()
+        for source, target in pairs:
+            try:
+                path = search(source, target)
+            except Exception:
+                # The plain BFS raises instead of returning None when there is no path
+                path = None
+            lengths.append(None if path is None else len(path))
+        seconds = time.perf_counter() - start
+    finally:
+        degrees.neighbors_for_person = neighbors_for_person
+
+    return {"expanded": expanded, "seconds": seconds, "lengths": lengths}
+
+
+def benchmark_graph(directory, queries):
+    """
+    Compares the memory held by `load_data` with the memory held by a CSR
+    `Graph`, then times `queries` random searches on both.
+    """
+    tracemalloc.start()
+    degrees.load_data(directory)
+    dict_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    tracemalloc.start()
+    graph = Graph.from_csv(directory)
+    graph_bytes = tracemalloc.get_traced_memory()[0]
+    tracemalloc.stop()
+
+    print(f"load_data:       {dict_bytes / 2 ** 20:10.1f} MiB")
+    print(f"Graph.from_csv:  {graph_bytes / 2 ** 20:10.1f} MiB ({dict_bytes / graph_bytes:.1f}x smaller)")
+
+    pairs = random_pairs(queries)
+    for name, search in [
+        ("dicts", degrees.shortest_path_bidirectional),
+        ("graph", graph.shortest_path),
+    ]:
+        lengths = []
+        start = time.perf_counter()
+        for source, target in pairs:
+            path = search(source, target)
+            lengths.append(None if path is None else len(path))
+        seconds = time.perf_counter() - start
+        print(f"{name:<15}{seconds:>12.3f}s{1000 * seconds / len(pairs):>12.3f} ms/query")
+
+        if name == "dicts":
+            expected = lengths
+        elif lengths != expected:
+            sys.exit("Graph search disagrees with the dictionary search")
+
+
+def benchmark_load(directory, min_year=None, max_year=None):
+    """
+    Load `directory` with the streaming loader and print how much it kept,
+    how fast it read and how much memory it peaked at.
+    """
+    stats = degrees.load_data_streaming(directory, min_year, max_year)
+    print(f"people:        {len(degrees.people):>12}")
+    print(f"movies:        {len(degrees.movies):>12}")
+    print(f"rows read:     {stats['rows']:>12}")
+    print(f"seconds:       {stats['seconds']:>12.2f}")
+    print(f"rows/second:   {stats['rows_per_second']:>12.0f}")
+    if stats["peak_memory"] is not None:
+        print(f"peak memory:   {stats['peak_memory'] / 1024:>12.1f} MiB")
+
+
+def benchmark_frontiers(max_size):
+    """
+    Prints the cost of one BFS expansion step (remove, contains_state, add)
+    for the list-backed and the indexed frontier, doubling the frontier size
+    up to `max_size`. The indexed frontier should stay flat.
+    """
+    print(f"{'size':>10}{'list ns/step':>16}{'indexed ns/step':>18}")
+    size = 1024
+    while size <= max_size:
+        indexed = time_expansions(IndexedQueueFrontier(), size)
+        if size <= LIST_FRONTIER_LIMIT:
+            listed = f"{time_expansions(QueueFrontier(), size):>16.0f}"
+        else:
+            listed = f"{'-':>16}"
+        print(f"{size:>10}{listed}{indexed:>18.0f}")
+        size *= 2
+
+
+def time_expansions(frontier, size):
+    """
+    Fills `frontier` with `size` nodes and returns the average nanoseconds
+    spent on one remove/contains_state/add cycle at that size.
+    """
+    for state in range(size):
+        frontier.add(Node(state=state, parent=None, action=None))
+
+    state = size
+    start = time.perf_counter()
+    for _ in range(EXPANSIONS):
+        node = frontier.remove()
+        if not frontier.contains_state(state):
+            frontier.add(Node(state=state, parent=node, action=None))
+        state += 1
+    return (time.perf_counter() - start) * 1e9 / EXPANSIONS
+
+
+if __name__ == "__main__":
+    main()
@@ -1,7 +1,17 @@
 import csv
 import sys
+import time
 
-from util import Node, StackFrontier, QueueFrontier
+try:
+    import resource
+except ImportError:
+    # Peak memory is only reported where the resource module exists (not on Windows)
+    resource = None
+
+from landmarks import load_landmarks
+from names import NameIndex, load_names
+from snapshot import load_graph
+from util import Node, IndexedQueueFrontier, join_paths
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -52,24 +62,133 @@ def load_data(directory):
                 pass
 
 
+def load_data_streaming(directory, min_year=None, max_year=None):
+    """
+    Load data from CSV files into memory, keeping only people and movies
+    that `stars.csv` references, and only movies released between
+    `min_year` and `max_year` (inclusive) when either is given.
+
+    Returns a dictionary with the rows read, the seconds taken, the
+    rows per second and the peak resident memory in KiB (None if unknown).
+    """
+    start = time.perf_counter()
+    rows = 0
+    filtered = min_year is not None or max_year is not None
+
+    # With a year range, find the movies inside it first
+    if filtered:
+        in_range = set()
+        for row in read_rows(f"{directory}/movies.csv"):
+            rows += 1
+            if released_between(row["year"], min_year, max_year):
+                in_range.add(row["id"])
+
+    # Find the people and movies that are actually connected by a star row
+    cast = set()
+    cast_movies = set()
+    for row in read_rows(f"{directory}/stars.csv"):
+        rows += 1
+        if not filtered or row["movie_id"] in in_range:
+            cast.add(row["person_id"])
+            cast_movies.add(row["movie_id"])
+    if filtered:
+        del in_range
+
+    # Load people
+    for row in read_rows(f"{directory}/people.csv"):
+        rows += 1
+        if row["id"] not in cast:
+            continue
+        people[row["id"]] = {
+            "name": row["name"],
+            "birth": row["birth"],
+            "movies": set()
+        }
+        names.setdefault(row["name"].lower(), set()).add(row["id"])
+    del cast
+
+    # Load movies
+    for row in read_rows(f"{directory}/movies.csv"):
+        rows += 1
+        if row["id"] not in cast_movies:
+            continue
+        movies[row["id"]] = {
+            "title": row["title"],
+            "year": row["year"],
+            "stars": set()
+        }
+    del cast_movies
+
+    # Load stars
+    for row in read_rows(f"{directory}/stars.csv"):
+        rows += 1
+        if row["person_id"] in people and row["movie_id"] in movies:
+            people[row["person_id"]]["movies"].add(row["movie_id"])
+            movies[row["movie_id"]]["stars"].add(row["person_id"])
+
+    seconds = time.perf_counter() - start
+    return {
+        "rows": rows,
+        "seconds": seconds,
+        "rows_per_second": rows / seconds if seconds else None,
+        "peak_memory": peak_memory()
+    }
+
+
+def read_rows(filename):
+    """
+    Yields the rows of a CSV file as dictionaries, one at a time.
+    """
+    with open(filename, encoding="utf-8") as f:
+        yield from csv.DictReader(f)
+
+
+def released_between(year, min_year, max_year):
+    """
+    Returns whether a movie's year is within the (inclusive) range;
+    movies without a usable year are left out.
+    """
+    try:
+        year = int(year)
+    except ValueError:
+        return False
+    return (min_year is None or year >= min_year) and (max_year is None or year <= max_year)
+
+
+def peak_memory():
+    """
+    Returns the peak resident memory of this process in KiB, or None if unknown.
+    """
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # macOS reports bytes, Linux reports KiB
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
 def main():
     if len(sys.argv) > 2:
         sys.exit("Usage: python degrees.py [directory]")
     directory = sys.argv[1] if len(sys.argv) == 2 else "large"
 
-    # Load data from files into memory
+    # Load data from files into memory, or from the snapshot of an earlier run
     print("Loading data...")
-    load_data(directory)
+    graph = load_graph(directory)
     print("Data loaded.")
 
-    source = person_id_for_name(input("Name: "))
+    source = person_id_for_name(input("Name: "), graph, directory)
     if source is None:
         sys.exit("Person not found.")
-    target = person_id_for_name(input("Name: "))
+    target = person_id_for_name(input("Name: "), graph, directory)
     if target is None:
         sys.exit("Person not found.")
 
-    path = shortest_path(source, target)
+    # Use the landmark index if one was built for this data
+    index = load_landmarks(directory, graph)
+    if index is not None:
+        path = index.shortest_path(source, target)
+    else:
+        path = graph.shortest_path(source, target)
 
     if path is None:
         print("Not connected.")
@@ -78,9 +197,9 @@ def main():
         print(f"{degrees} degrees of separation.")
         path = [(None, source)] + path
         for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
+            person1 = graph.person(path[i][1])["name"]
+            person2 = graph.person(path[i + 1][1])["name"]
+            movie = graph.movie(path[i + 1][0])["title"]
             print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
@@ -94,10 +213,10 @@ def shortest_path(source_id, target_id):
     # Fetch ids of the source and target actors
 
     # Initialize a frontier; Use Breadth First Search to find the shortest path
-    frontier = QueueFrontier()
+    frontier = IndexedQueueFrontier()
     frontier.add(Node(state=source_id, parent=None, action=None))
 
-    # Keep explored ids to avoid checking the same people and movies
+    # Keep explored ids to avoid checking the same people twice
     explored = set()
 
     while True:
@@ -117,26 +236,89 @@ def shortest_path(source_id, target_id):
             path.reverse()
             return path
 
-        explored.add((node.action, node.state))
+        explored.add(node.state)
 
         for action, state in neighbors_for_person(node.state):
-            if not frontier.contains_state(state) and (action, state) not in explored:
+            if not frontier.contains_state(state) and state not in explored:
                 child = Node(state=state, parent=node, action=action)
                 frontier.add(child)
 
 
-def person_id_for_name(name):
+def shortest_path_bidirectional(source_id, target_id):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, growing one Breadth First Search
+    frontier from the source and one from the target until they meet.
+
+    If no possible path, returns None.
+    """
+    if source_id == target_id:
+        return []
+
+    # Map every reached person to the (movie_id, person_id) step that reached them
+    forward = {source_id: None}
+    backward = {target_id: None}
+    forward_frontier = [source_id]
+    backward_frontier = [target_id]
+
+    while forward_frontier and backward_frontier:
+
+        # Always grow the smaller side by one full layer, it is the cheaper one to expand
+        if len(forward_frontier) <= len(backward_frontier):
+            forward_frontier, meeting = expand_layer(forward_frontier, forward, backward)
+        else:
+            backward_frontier, meeting = expand_layer(backward_frontier, backward, forward)
+
+        if meeting is not None:
+            return join_paths(forward, backward, meeting)
+
+    return None
+
+
+def expand_layer(frontier, reached, other):
+    """
+    Expands every person in `frontier` by one step, recording how each new
+    person was reached in `reached`.
+
+    Returns the next layer and the first person that is also in `other`
+    (None if the two searches did not meet).
+    """
+    layer = []
+    for person_id in frontier:
+        for movie_id, neighbor_id in neighbors_for_person(person_id):
+            if neighbor_id in reached:
+                continue
+            reached[neighbor_id] = (movie_id, person_id)
+
+            # Both sides grow layer by layer, so the first meeting is on a shortest path
+            if neighbor_id in other:
+                return layer, neighbor_id
+            layer.append(neighbor_id)
+
+    return layer, None
+
+
+def person_id_for_name(name, graph=None, directory=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Looks the name up in `graph` if given, otherwise in the loaded dictionaries.
+    Suggestions for a name that isn't found come from the name index saved in
+    `directory`, the directory `graph` was loaded from, if given.
     """
-    person_ids = list(names.get(name.lower(), set()))
+    if graph is not None:
+        person_ids = graph.person_ids_for_name(name)
+    else:
+        person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
+        if graph is not None:
+            print_suggestions(name, graph, directory)
         return None
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
-            person = people[person_id]
+            person = graph.person(person_id) if graph is not None else people[person_id]
             name = person["name"]
             birth = person["birth"]
             print(f"ID: {person_id}, Name: {name}, Birth: {birth}")
@@ -151,6 +333,19 @@ def person_id_for_name(name):
         return person_ids[0]
 
 
+def print_suggestions(name, graph, directory):
+    """
+    Prints the names in `graph` closest to a name that wasn't found.
+    """
+    index = load_names(directory, graph) if directory is not None else NameIndex.build(graph)
+    candidates = index.suggest(name, limit=5)
+    if candidates:
+        print(f"No '{name}', did you mean:")
+        for _, person_ids in candidates:
+            person = graph.person(person_ids[0])
+            print(f"  {person['name']}")
+
+
 def neighbors_for_person(person_id):
     """
     Returns (movie_id, person_id) pairs for people
@@ -164,5 +359,54 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def distances_from(source_id):
+    """
+    Runs a single Breadth First Search from the source over every person.
+
+    Returns two dictionaries: the degrees of separation of every reachable
+    person, and the (movie_id, person_id) step that first reached them,
+    from which `path_from_parents` rebuilds any shortest path.
+    """
+    distances = {source_id: 0}
+    parents = {source_id: None}
+
+    # Every star of an expanded movie is reached at once, so a movie never needs a second look
+    seen_movies = set()
+
+    frontier = [source_id]
+    while frontier:
+        layer = []
+        for person_id in frontier:
+            for movie_id in people[person_id]["movies"]:
+                if movie_id in seen_movies:
+                    continue
+                seen_movies.add(movie_id)
+                for star_id in movies[movie_id]["stars"]:
+                    if star_id not in distances:
+                        distances[star_id] = distances[person_id] + 1
+                        parents[star_id] = (movie_id, person_id)
+                        layer.append(star_id)
+        frontier = layer
+
+    return distances, parents
+
+
+def path_from_parents(parents, target_id):
+    """
+    Returns the list of (movie_id, person_id) pairs from the source of
+    `distances_from` to the target, or None if the target wasn't reached.
+    """
+    if target_id not in parents:
+        return None
+
+    path = []
+    while parents[target_id] is not None:
+        movie_id, parent_id = parents[target_id]
+        path.append((movie_id, target_id))
+        target_id = parent_id
+    path.reverse()
+    return path
+
+
 if __name__ == "__main__":
     main()
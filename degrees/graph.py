@@ -0,0 +1,305 @@
+import csv
+import sys
+from array import array
+from bisect import bisect_left
+
+from util import join_paths
+
+
+class Graph():
+    """
+    Compact co-star graph. Person and movie ids are interned to dense ints,
+    and person -> movies and movie -> stars are stored as CSR offset/index
+    arrays: the movies of person `p` are `person_movies[person_offsets[p]:person_offsets[p + 1]]`.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_index=None, movie_index=None, name_order=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_stars = movie_stars
+
+        # A loaded snapshot passes its own lookups, otherwise build them here
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        if name_order is None:
+            # Person indexes sorted by lowercase name, searched with bisect instead of a dict of names
+            name_order = array("i", sorted(range(len(person_names)), key=lambda i: person_names[i].lower()))
+        self.person_index = person_index
+        self.movie_index = movie_index
+        self.name_order = name_order
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Load people, movies and stars straight from the CSV files
+        without building the intermediate dictionaries of sets.
+        """
+        person_ids, person_names, person_births = [], [], []
+        person_index = {}
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person_index[row["id"]] = len(person_ids)
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                # Births and years repeat a lot, so share one string per distinct value
+                person_births.append(sys.intern(row["birth"]))
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        movie_index = {}
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                movie_index[row["id"]] = len(movie_ids)
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(sys.intern(row["year"]))
+
+        # Keep stars as two parallel int arrays, skipping unknown ids like load_data does
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            for row in csv.DictReader(f):
+                person = person_index.get(row["person_id"])
+                movie = movie_index.get(row["movie_id"])
+                if person is None or movie is None:
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+
+        return cls.from_stars(person_ids, person_names, person_births,
+                              movie_ids, movie_titles, movie_years,
+                              star_people, star_movies)
+
+    @classmethod
+    def from_data(cls, people, movies):
+        """
+        Build a graph from the `people` and `movies` dictionaries filled by `degrees.load_data`.
+        """
+        person_ids = list(people)
+        movie_ids = list(movies)
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+
+        star_people = array("i")
+        star_movies = array("i")
+        for person, person_id in enumerate(person_ids):
+            for movie_id in people[person_id]["movies"]:
+                star_people.append(person)
+                star_movies.append(movie_index[movie_id])
+
+        return cls.from_stars(person_ids,
+                              [people[person_id]["name"] for person_id in person_ids],
+                              [people[person_id]["birth"] for person_id in person_ids],
+                              movie_ids,
+                              [movies[movie_id]["title"] for movie_id in movie_ids],
+                              [movies[movie_id]["year"] for movie_id in movie_ids],
+                              star_people, star_movies)
+
+    @classmethod
+    def from_stars(cls, person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years, star_people, star_movies):
+        """
+        Build a graph from parallel arrays of (person, movie) index pairs.
+        """
+        person_offsets, person_movies = csr(len(person_ids), star_people, star_movies)
+        movie_offsets, movie_stars = csr(len(movie_ids), star_movies, star_people)
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_stars)
+
+    def name_key(self, person):
+        """
+        Returns the lowercase name of the person at index `person`.
+        """
+        return self.person_names[person].lower()
+
+    def person_ids_for_name(self, name):
+        """
+        Returns the IMDB ids of every person with the given name.
+        """
+        name = name.lower()
+        person_ids = []
+        i = bisect_left(self.name_order, name, key=self.name_key)
+        while i < len(self.name_order) and self.name_key(self.name_order[i]) == name:
+            person_ids.append(self.person_ids[self.name_order[i]])
+            i += 1
+        return person_ids
+
+    def person(self, person_id):
+        """
+        Returns a dictionary of: name, birth for a person_id.
+        """
+        i = self.person_index[person_id]
+        return {"name": self.person_names[i], "birth": self.person_births[i]}
+
+    def movie(self, movie_id):
+        """
+        Returns a dictionary of: title, year for a movie_id.
+        """
+        i = self.movie_index[movie_id]
+        return {"title": self.movie_titles[i], "year": self.movie_years[i]}
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) index pairs for people who starred
+        with the person at index `person`.
+        """
+        person_movies, movie_stars, movie_offsets = self.person_movies, self.movie_stars, self.movie_offsets
+        for k in range(self.person_offsets[person], self.person_offsets[person + 1]):
+            movie = person_movies[k]
+            for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                yield movie, movie_stars[j]
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return set(
+            (self.movie_ids[movie], self.person_ids[person])
+            for movie, person in self.neighbors(self.person_index[person_id])
+        )
+
+    def shortest_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, using a bidirectional
+        Breadth First Search over the index arrays.
+
+        If no possible path, returns None.
+        """
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        if source == target:
+            return []
+
+        # Map every reached person to the (movie, person) step that reached them
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        while forward_frontier and backward_frontier:
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = self.expand_layer(forward_frontier, forward, backward)
+            else:
+                backward_frontier, meeting = self.expand_layer(backward_frontier, backward, forward)
+
+            if meeting is not None:
+                return [
+                    (self.movie_ids[movie], self.person_ids[person])
+                    for movie, person in join_paths(forward, backward, meeting)
+                ]
+
+        return None
+
+    def distances_from(self, source):
+        """
+        Runs a single Breadth First Search from the person at index `source`.
+
+        Returns three int arrays indexed by person: the degrees of separation
+        (-1 if unreachable), and the person and movie that first reached them
+        (-1 for the source and unreachable people).
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        distances = array("i", [-1]) * len(self.person_ids)
+        parents = array("i", [-1]) * len(self.person_ids)
+        parent_movies = array("i", [-1]) * len(self.person_ids)
+
+        # Every star of an expanded movie is reached at once, so a movie never needs a second look
+        seen_movies = bytearray(len(self.movie_ids))
+
+        distances[source] = 0
+        frontier = [source]
+        depth = 0
+        while frontier:
+            depth += 1
+            layer = []
+            for person in frontier:
+                for k in range(person_offsets[person], person_offsets[person + 1]):
+                    movie = person_movies[k]
+                    if seen_movies[movie]:
+                        continue
+                    seen_movies[movie] = 1
+                    for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                        star = movie_stars[j]
+                        if distances[star] == -1:
+                            distances[star] = depth
+                            parents[star] = person
+                            parent_movies[star] = movie
+                            layer.append(star)
+            frontier = layer
+
+        return distances, parents, parent_movies
+
+    def path_from_parents(self, parents, parent_movies, target):
+        """
+        Returns the list of (movie_id, person_id) pairs from the source of
+        `distances_from` to the person at index `target`, who must be reachable.
+        """
+        path = []
+        while parents[target] != -1:
+            path.append((self.movie_ids[parent_movies[target]], self.person_ids[target]))
+            target = parents[target]
+        path.reverse()
+        return path
+
+    def expand_layer(self, frontier, reached, other):
+        """
+        Expands every person in `frontier` by one step, recording how each new
+        person was reached in `reached`.
+
+        Returns the next layer and the first person that is also in `other`
+        (None if the two searches did not meet).
+        """
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_stars = self.movie_offsets, self.movie_stars
+
+        layer = []
+        for person in frontier:
+            for k in range(person_offsets[person], person_offsets[person + 1]):
+                movie = person_movies[k]
+                for j in range(movie_offsets[movie], movie_offsets[movie + 1]):
+                    neighbor = movie_stars[j]
+                    if neighbor in reached:
+                        continue
+                    reached[neighbor] = (movie, person)
+                    if neighbor in other:
+                        return layer, neighbor
+                    layer.append(neighbor)
+
+        return layer, None
+
+
+def csr(n, rows, columns):
+    """
+    Returns the (offsets, indexes) arrays of the CSR layout of `n` rows
+    holding the edges rows[i] -> columns[i].
+    """
+    offsets = array("i", [0]) * (n + 1)
+    for row in rows:
+        offsets[row + 1] += 1
+    for i in range(n):
+        offsets[i + 1] += offsets[i]
+
+    # Fill every row from its start, moving a cursor along as entries land
+    cursor = array("i", offsets[:n])
+    indexes = array("i", [0]) * len(rows)
+    for row, column in zip(rows, columns):
+        indexes[cursor[row]] = column
+        cursor[row] += 1
+
+    return offsets, indexes
+
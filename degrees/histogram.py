@@ -0,0 +1,56 @@
+import csv
+import sys
+
+from degrees import person_id_for_name
+from snapshot import load_graph
+
+
+def main():
+    if len(sys.argv) not in (3, 4):
+        sys.exit("Usage: python histogram.py directory name [output.csv]")
+    directory = sys.argv[1]
+
+    print("Loading data...")
+    graph = load_graph(directory)
+    print("Data loaded.")
+
+    source = person_id_for_name(sys.argv[2], graph, directory)
+    if source is None:
+        sys.exit("Person not found.")
+
+    distances, _, _ = graph.distances_from(graph.person_index[source])
+    counts = histogram(distances)
+
+    if len(sys.argv) == 4:
+        with open(sys.argv[3], "w", newline="", encoding="utf-8") as f:
+            write_histogram(f, counts)
+    else:
+        write_histogram(sys.stdout, counts)
+
+
+def histogram(distances):
+    """
+    Returns a dictionary mapping each degree of separation to the number of
+    people at that distance, with unreachable people counted under None.
+    """
+    counts = {}
+    for distance in distances:
+        key = None if distance == -1 else distance
+        counts[key] = counts.get(key, 0) + 1
+    return counts
+
+
+def write_histogram(f, counts):
+    """
+    Write the histogram as CSV rows of degrees, people.
+    """
+    writer = csv.writer(f)
+    writer.writerow(["degrees", "people"])
+    for distance in sorted(d for d in counts if d is not None):
+        writer.writerow([distance, counts[distance]])
+    if None in counts:
+        writer.writerow(["unreachable", counts[None]])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,314 @@
+import math
+import mmap
+import os
+import random
+import struct
+import sys
+import time
+from array import array
+
+from snapshot import byte_order, csv_key, load_graph
+from util import join_paths
+
+# Name of the index file written next to the CSV files
+LANDMARKS = "landmarks.index"
+
+# Number of landmark people to search from when building the index
+COUNT = 32
+
+# Bump whenever the layout below changes so old indexes are rebuilt
+VERSION = 1
+
+MAGIC = b"LMK\0"
+
+# Magic, version, byte order, (mtime_ns, size) of people/movies/stars.csv, landmarks, people
+HEADER = struct.Struct("<4sII6qqq")
+
+
+def main():
+    usage = "Usage: python landmarks.py build directory [count] | validate directory [queries]"
+    if len(sys.argv) not in (3, 4) or sys.argv[1] not in ("build", "validate"):
+        sys.exit(usage)
+    directory = sys.argv[2]
+
+    print("Loading data...")
+    graph = load_graph(directory)
+    print("Data loaded.")
+
+    if sys.argv[1] == "build":
+        count = int(sys.argv[3]) if len(sys.argv) == 4 else COUNT
+        start = time.perf_counter()
+        index = LandmarkIndex.build(graph, count)
+        index.save(os.path.join(directory, LANDMARKS), csv_key(directory))
+        print(f"Indexed {len(index.landmarks)} landmarks in {time.perf_counter() - start:.1f}s.")
+    else:
+        index = load_landmarks(directory, graph)
+        if index is None:
+            sys.exit("No up to date index, run: python landmarks.py build directory")
+        queries = int(sys.argv[3]) if len(sys.argv) == 4 else 1000
+        validate(graph, index, queries)
+
+
+def load_landmarks(directory, graph):
+    """
+    Return the `LandmarkIndex` saved in `directory` for `graph`,
+    or None if there is none or the CSV files changed since it was built.
+    """
+    return LandmarkIndex.load(os.path.join(directory, LANDMARKS), graph, csv_key(directory))
+
+
+class LandmarkIndex():
+    """
+    Degrees of separation from a few well connected landmark people to
+    everyone else. For any landmark L the triangle inequality gives
+    |d(L, s) - d(L, t)| <= d(s, t) <= d(L, s) + d(L, t).
+    """
+
+    def __init__(self, graph, landmarks, distances):
+        self.graph = graph
+        self.landmarks = landmarks
+
+        # One array per landmark, indexed by person, -1 where unreachable
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=COUNT):
+        """
+        Search from the `count` people with the most co-star slots
+        and keep the distances to everyone.
+        """
+        people = range(len(graph.person_ids))
+        landmarks = sorted(people, key=lambda person: -co_stars(graph, person))[:count]
+
+        distances = []
+        for landmark in landmarks:
+            landmark_distances = graph.distances_from(landmark)[0]
+            if max(landmark_distances) > 127:
+                raise ValueError("Degrees of separation don't fit in a byte")
+            distances.append(array("b", landmark_distances))
+
+        return cls(graph, array("i", landmarks), distances)
+
+    def save(self, path, key):
+        """
+        Write the index to `path`, tagged with the CSV `key` it was built from.
+        """
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, byte_order(), *key,
+                                len(self.landmarks), len(self.graph.person_ids)))
+            f.write(array("i", self.landmarks).tobytes())
+            for landmark_distances in self.distances:
+                f.write(array("b", landmark_distances).tobytes())
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, graph, key):
+        """
+        Memory-map the index at `path`. Returns None if there is none, or if it
+        was written by another version or for different CSV files.
+        """
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(buffer) < HEADER.size:
+            return None
+        header = HEADER.unpack_from(buffer)
+        count, people = header[9:]
+        if (header[:3] != (MAGIC, VERSION, byte_order()) or header[3:9] != key
+                or people != len(graph.person_ids)):
+            return None
+
+        view = memoryview(buffer)
+        offset = HEADER.size
+        landmarks = view[offset:offset + 4 * count].cast("i")
+        offset += 4 * count
+        distances = []
+        for _ in range(count):
+            distances.append(view[offset:offset + people].cast("b"))
+            offset += people
+        return cls(graph, landmarks, distances)
+
+    def bounds(self, source, target):
+        """
+        Returns the (lower, upper) bounds on the degrees of separation between
+        the people at indexes `source` and `target`.
+
+        The lower bound is infinite if some landmark proves they aren't connected,
+        and the upper bound is infinite if no landmark reaches both.
+        """
+        lower = 0
+        upper = math.inf
+        for landmark_distances in self.distances:
+            source_distance = landmark_distances[source]
+            target_distance = landmark_distances[target]
+            if source_distance == -1 and target_distance == -1:
+                continue
+            if source_distance == -1 or target_distance == -1:
+                return math.inf, math.inf
+            lower = max(lower, abs(source_distance - target_distance))
+            upper = min(upper, source_distance + target_distance)
+        return lower, upper
+
+    def distance(self, source_id, target_id):
+        """
+        Returns the degrees of separation if the landmarks pin it down exactly
+        (infinity if they prove the two aren't connected), otherwise None.
+        """
+        lower, upper = self.bounds(self.graph.person_index[source_id], self.graph.person_index[target_id])
+        return lower if lower == upper else None
+
+    def shortest_path(self, source_id, target_id):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        Walks through a landmark when the bounds are tight, otherwise searches
+        only until the upper bound is proven.
+
+        If no possible path, returns None.
+        """
+        graph = self.graph
+        source = graph.person_index[source_id]
+        target = graph.person_index[target_id]
+        if source == target:
+            return []
+
+        lower, upper = self.bounds(source, target)
+        if lower == math.inf:
+            return None
+        if lower == upper:
+            return self.path_through_landmark(source, target, upper)
+        return self.search(source, target, upper)
+
+    def path_through_landmark(self, source, target, distance):
+        """
+        Returns the path from `source` to `target` that goes through a
+        landmark lying on a shortest path between them.
+        """
+        for landmark_distances in self.distances:
+            if landmark_distances[source] + landmark_distances[target] == distance:
+                break
+
+        to_landmark = self.descend(source, landmark_distances)
+        from_landmark = self.descend(target, landmark_distances)
+
+        graph = self.graph
+        path = [(graph.movie_ids[movie], graph.person_ids[person]) for movie, person in to_landmark]
+        people = [target] + [person for _, person in from_landmark]
+        for i in reversed(range(len(from_landmark))):
+            path.append((graph.movie_ids[from_landmark[i][0]], graph.person_ids[people[i]]))
+        return path
+
+    def descend(self, person, landmark_distances):
+        """
+        Returns the (movie, person) steps from `person` to the landmark,
+        each one getting one degree closer to it.
+        """
+        graph = self.graph
+        steps = []
+        while landmark_distances[person] > 0:
+            closer = landmark_distances[person] - 1
+            for movie, neighbor in graph.neighbors(person):
+                if landmark_distances[neighbor] == closer:
+                    steps.append((movie, neighbor))
+                    person = neighbor
+                    break
+        return steps
+
+    def search(self, source, target, upper):
+        """
+        Bidirectional Breadth First Search from `source` to `target` that stops
+        as soon as it proves nothing is shorter than the `upper` bound, and then
+        goes through a landmark instead of expanding the widest layers.
+
+        Returns the path, or None if they aren't connected.
+        """
+        graph = self.graph
+        forward = {source: None}
+        backward = {target: None}
+        forward_frontier = [source]
+        backward_frontier = [target]
+
+        # Layers expanded so far on both sides together
+        depth = 0
+        while forward_frontier and backward_frontier:
+
+            # No meeting within `depth` degrees means the distance is more than `depth`
+            if depth >= upper - 1:
+                return self.path_through_landmark(source, target, upper)
+
+            if len(forward_frontier) <= len(backward_frontier):
+                forward_frontier, meeting = graph.expand_layer(forward_frontier, forward, backward)
+            else:
+                backward_frontier, meeting = graph.expand_layer(backward_frontier, backward, forward)
+            depth += 1
+
+            if meeting is not None:
+                return [
+                    (graph.movie_ids[movie], graph.person_ids[person])
+                    for movie, person in join_paths(forward, backward, meeting)
+                ]
+
+        return None
+
+
+def co_stars(graph, person):
+    """
+    Returns the number of (movie, co-star) slots of the person at index `person`.
+    """
+    total = 0
+    for k in range(graph.person_offsets[person], graph.person_offsets[person + 1]):
+        movie = graph.person_movies[k]
+        total += graph.movie_offsets[movie + 1] - graph.movie_offsets[movie]
+    return total
+
+
+def validate(graph, index, queries, seed=0):
+    """
+    Check the landmark bounds and searches against plain Breadth First Search
+    on `queries` random pairs, exiting with an error on the first mismatch.
+    """
+    rng = random.Random(seed)
+    people = len(graph.person_ids)
+    exact = 0
+    for _ in range(queries):
+        source, target = rng.randrange(people), rng.randrange(people)
+        source_id, target_id = graph.person_ids[source], graph.person_ids[target]
+
+        expected = graph.shortest_path(source_id, target_id)
+        distance = math.inf if expected is None else len(expected)
+        lower, upper = index.bounds(source, target)
+        if not lower <= distance <= upper:
+            sys.exit(f"Bounds {lower}..{upper} miss {distance} for {source_id} -> {target_id}")
+        exact += lower == upper
+
+        path = index.shortest_path(source_id, target_id)
+        if (path is None) != (expected is None) or (path is not None and len(path) != distance):
+            sys.exit(f"Landmark path {path} isn't shortest for {source_id} -> {target_id}")
+        if path is not None and not is_path(graph, source_id, path):
+            sys.exit(f"Landmark path {path} is broken for {source_id} -> {target_id}")
+
+    print(f"{queries} queries match Breadth First Search ({exact} answered exactly by the bounds).")
+
+
+def is_path(graph, source_id, path):
+    """
+    Returns whether every step of `path` is a movie both people starred in.
+    """
+    person = graph.person_index[source_id]
+    for movie_id, person_id in path:
+        movie = graph.movie_index[movie_id]
+        movies = graph.person_movies[graph.person_offsets[person]:graph.person_offsets[person + 1]]
+        person = graph.person_index[person_id]
+        stars = graph.movie_stars[graph.movie_offsets[movie]:graph.movie_offsets[movie + 1]]
+        if movie not in movies or person not in stars:
+            return False
+    return True
+
+
+if __name__ == "__main__":
+    main()
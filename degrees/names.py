@@ -0,0 +1,269 @@
+import heapq
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+
+from snapshot import byte_order, csv_key, read_array, read_strings, write_array, write_strings
+
+# Name of the index file written next to the CSV files
+NAMES = "names.index"
+
+# Number of candidates returned by prefix and approximate searches
+LIMIT = 10
+
+# Trigrams shared by more names than this carry little signal and are only used as a last resort
+COMMON = 50000
+
+# Bump whenever the layout below changes so old indexes are rebuilt
+VERSION = 1
+
+MAGIC = b"NAM\0"
+
+# Magic, version, byte order, (mtime_ns, size) of people/movies/stars.csv, people, keys, trigrams, postings
+HEADER = struct.Struct("<4sII6qqqqq4x")
+
+
+def load_names(directory, graph):
+    """
+    Return the `NameIndex` of `graph`, the graph of a directory of CSV files.
+
+    The index is memory-mapped from the directory as long as the CSV files
+    keep the same modification times and sizes. Otherwise it is built again,
+    and written for the next run.
+    """
+    path = os.path.join(directory, NAMES)
+    key = csv_key(directory)
+
+    index = NameIndex.load(path, graph, key)
+    if index is None:
+        index = NameIndex.build(graph)
+        try:
+            index.save(path, key)
+        except OSError:
+            # A read-only data directory only costs us the cache
+            pass
+    return index
+
+
+class NameIndex():
+    """
+    Prefix and approximate name search over the people of a `Graph`.
+
+    Distinct lowercase names are kept in sorted order (`keys`), so a prefix is
+    a range found by bisection, and each character trigram of a name points to
+    the keys containing it, so a misspelled name still shares most trigrams
+    with the right one. Trigrams are sorted too (`trigrams`), and the keys of
+    trigram `i` are `posting_keys[posting_offsets[i]:posting_offsets[i + 1]]`,
+    so the whole index is a few flat arrays that memory-map from a file.
+    """
+
+    def __init__(self, graph, keys, key_starts, sizes, trigrams, posting_offsets, posting_keys):
+        self.graph = graph
+        self.keys = keys
+
+        # People of keys[key] are graph.name_order[key_starts[key]:key_starts[key + 1]]
+        self.key_starts = key_starts
+
+        # Number of trigrams of every key
+        self.sizes = sizes
+
+        self.trigrams = trigrams
+        self.posting_offsets = posting_offsets
+        self.posting_keys = posting_keys
+
+    @classmethod
+    def build(cls, graph):
+        """
+        Index the names of the people of `graph`.
+        """
+        # graph.name_order is sorted by lowercase name; group equal names into one key
+        keys = []
+        key_starts = array("i")
+        for i, person in enumerate(graph.name_order):
+            name = graph.person_names[person].lower()
+            if not keys or keys[-1] != name:
+                keys.append(name)
+                key_starts.append(i)
+        key_starts.append(len(graph.name_order))
+
+        # Maps each trigram to the keys that contain it, and counts the trigrams of every key
+        postings = {}
+        sizes = array("i")
+        for key, name in enumerate(keys):
+            name_trigrams = trigrams(name)
+            sizes.append(len(name_trigrams))
+            for trigram in name_trigrams:
+                postings.setdefault(trigram, array("i")).append(key)
+
+        # Lay the postings out one after the other, in trigram order
+        sorted_trigrams = sorted(postings)
+        posting_offsets = array("i", [0])
+        posting_keys = array("i")
+        for trigram in sorted_trigrams:
+            posting_keys.extend(postings[trigram])
+            posting_offsets.append(len(posting_keys))
+        return cls(graph, keys, key_starts, sizes, sorted_trigrams, posting_offsets, posting_keys)
+
+    def save(self, path, key):
+        """
+        Write the index to `path`, tagged with the CSV `key` it was built from.
+        """
+        # Write to a temporary file first so readers never see half an index
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(HEADER.pack(MAGIC, VERSION, byte_order(), *key, len(self.graph.person_ids),
+                                len(self.keys), len(self.trigrams), len(self.posting_keys)))
+            for values in (self.key_starts, self.sizes, self.posting_offsets, self.posting_keys):
+                write_array(f, array("i", values))
+            for strings in (self.keys, self.trigrams):
+                write_strings(f, strings)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, graph, key):
+        """
+        Memory-map the index at `path`. Returns None if there is none, or if it
+        was written by another version or for different CSV files.
+        """
+        try:
+            with open(path, "rb") as f:
+                buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError):
+            return None
+
+        if len(buffer) < HEADER.size:
+            return None
+        header = HEADER.unpack_from(buffer)
+        people, keys, trigram_count, postings = header[9:]
+        if (header[:3] != (MAGIC, VERSION, byte_order()) or header[3:9] != key
+                or people != len(graph.person_ids)):
+            return None
+
+        view = memoryview(buffer)
+        offset = HEADER.size
+        arrays = []
+        for length in (keys + 1, keys, trigram_count + 1, postings):
+            values, offset = read_array(view, offset, length)
+            arrays.append(values)
+        tables = []
+        for length in (keys, trigram_count):
+            strings, offset = read_strings(view, offset, length)
+            tables.append(strings)
+
+        key_starts, sizes, posting_offsets, posting_keys = arrays
+        key_names, sorted_trigrams = tables
+        return cls(graph, key_names, key_starts, sizes, sorted_trigrams, posting_offsets, posting_keys)
+
+    def keys_with(self, trigram):
+        """
+        Returns the keys whose name contains `trigram`, or None if there are none.
+        """
+        i = bisect_left(self.trigrams, trigram)
+        if i < len(self.trigrams) and self.trigrams[i] == trigram:
+            return self.posting_keys[self.posting_offsets[i]:self.posting_offsets[i + 1]]
+        return None
+
+    def person_ids(self, key):
+        """
+        Returns the IMDB ids of the people whose lowercase name is `keys[key]`.
+        """
+        graph = self.graph
+        return [
+            graph.person_ids[graph.name_order[i]]
+            for i in range(self.key_starts[key], self.key_starts[key + 1])
+        ]
+
+    def lookup(self, name):
+        """
+        Returns the IMDB ids of every person with exactly this name.
+        """
+        name = name.lower()
+        key = bisect_left(self.keys, name)
+        if key < len(self.keys) and self.keys[key] == name:
+            return self.person_ids(key)
+        return []
+
+    def prefix(self, prefix, limit=LIMIT):
+        """
+        Returns up to `limit` (name, person_ids) pairs whose name starts with `prefix`,
+        in alphabetical order.
+        """
+        prefix = prefix.lower()
+        matches = []
+        key = bisect_left(self.keys, prefix)
+        while key < len(self.keys) and len(matches) < limit and self.keys[key].startswith(prefix):
+            matches.append((self.keys[key], self.person_ids(key)))
+            key += 1
+        return matches
+
+    def search(self, name, limit=LIMIT):
+        """
+        Returns up to `limit` (score, name, person_ids) candidates for a possibly
+        misspelled name, best first. The score is the Dice similarity of the
+        trigram sets, 1.0 for an exact match.
+        """
+        query = trigrams(name.lower())
+        if not query:
+            return []
+
+        # Count shared trigrams per key, starting from the rarest trigrams
+        postings = sorted(
+            (keys for keys in map(self.keys_with, query) if keys is not None),
+            key=len
+        )
+        shared = {}
+        for keys in postings:
+            if len(keys) > COMMON and shared:
+                break
+            for key in keys:
+                shared[key] = shared.get(key, 0) + 1
+
+        candidates = heapq.nlargest(
+            limit, shared,
+            key=lambda key: (2 * shared[key] / (len(query) + self.sizes[key]), -key)
+        )
+        return [
+            (2 * shared[key] / (len(query) + self.sizes[key]), self.keys[key], self.person_ids(key))
+            for key in candidates
+        ]
+
+    def suggest(self, name, limit=LIMIT):
+        """
+        Returns up to `limit` (name, person_ids) pairs for a name that wasn't
+        found: names it is the start of first, in alphabetical order, then the
+        closest approximate matches.
+        """
+        suggestions = self.prefix(name, limit) if name else []
+        for _, key_name, person_ids in self.search(name, limit):
+            if len(suggestions) == limit:
+                break
+            if all(key_name != suggested for suggested, _ in suggestions):
+                suggestions.append((key_name, person_ids))
+        return suggestions
+
+    def resolve_many(self, names, limit=LIMIT):
+        """
+        Resolves a batch of names, looking every distinct name up only once.
+
+        Returns a dictionary mapping every name to a pair: the IMDB ids of the
+        people with exactly that name, and if there are none, up to `limit`
+        suggestions as returned by `suggest`.
+        """
+        resolved = {}
+        for name in names:
+            if name in resolved:
+                continue
+            person_ids = self.lookup(name)
+            resolved[name] = (person_ids, [] if person_ids else self.suggest(name, limit))
+        return resolved
+
+
+def trigrams(name):
+    """
+    Returns the set of character trigrams of a name, padded so that
+    the start and end of the name count as well.
+    """
+    padded = f"  {name} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
@@ -0,0 +1,221 @@
+import csv
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from names import load_names
+from snapshot import load_graph
+
+# Graph and name index shared by the worker processes
+graph = None
+name_index = None
+
+# Number of close names suggested for a name that isn't found
+SUGGESTIONS = 3
+
+# Fields of a query, all strings
+QUERY_FIELDS = ("source", "target", "source_id", "target_id")
+
+# Number of queries of a query file handed to a worker at a time, their names resolved together
+CHUNKSIZE = 16
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python server.py directory [queries.csv]")
+    directory = sys.argv[1]
+
+    # Build the snapshot and name index once up front; forked workers inherit
+    # them, and other workers only have to memory-map them
+    global graph, name_index
+    print("Loading data...", file=sys.stderr)
+    graph = load_graph(directory)
+    name_index = load_names(directory, graph)
+    print("Data loaded.", file=sys.stderr)
+
+    # A file of queries is handed out in batches, but a query from stdin is
+    # answered as soon as its line arrives rather than waiting for a batch
+    if len(sys.argv) == 3:
+        batches = in_batches(read_query_file(sys.argv[2]), CHUNKSIZE)
+    else:
+        batches = ([query] for query in read_json_lines(sys.stdin))
+
+    latencies = []
+    start = time.perf_counter()
+    with multiprocessing.Pool(os.cpu_count(), initializer=init_worker, initargs=(directory,)) as pool:
+        for results in pool.imap(answer_batch, batches):
+            for result in results:
+                latencies.append(result.pop("seconds"))
+                print(json.dumps(result), flush=True)
+    seconds = time.perf_counter() - start
+
+    print_report(latencies, seconds)
+
+
+def read_query_file(filename):
+    """
+    Yield queries from a CSV file whose rows are a source name and a target name.
+    """
+    with open(filename, encoding="utf-8") as f:
+        for row in csv.reader(f):
+            if len(row) >= 2:
+                yield {"source": row[0].strip(), "target": row[1].strip()}
+
+
+def read_json_lines(lines):
+    """
+    Yield queries from JSON lines such as {"source": "Tom Cruise", "target": "Tom Hanks"}.
+    An IMDB id may be given instead of a name as "source_id" or "target_id".
+
+    A line that isn't a JSON object is yielded as an error for that line, so
+    the rest of the queries are still answered.
+    """
+    for line in lines:
+        line = line.strip()
+        if not line:
+            continue
+        try:
+            query = json.loads(line)
+        except json.JSONDecodeError as e:
+            yield {"error": f"Invalid JSON: {e}", "line": line}
+            continue
+        if not isinstance(query, dict):
+            yield {"error": "Expected a JSON object with a source and a target.", "line": line}
+            continue
+        fields = [field for field in QUERY_FIELDS if field in query and not isinstance(query[field], str)]
+        if fields:
+            yield {"error": f"Expected strings for {', '.join(fields)}.", "line": line}
+            continue
+        yield query
+
+
+def init_worker(directory):
+    """
+    Load the shared read-only graph in a worker process, unless it was inherited.
+    """
+    global graph, name_index
+    if graph is None:
+        graph = load_graph(directory)
+        name_index = load_names(directory, graph)
+
+
+def in_batches(queries, size):
+    """
+    Yield lists of up to `size` queries.
+    """
+    batch = []
+    for query in queries:
+        batch.append(query)
+        if len(batch) == size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+def answer_batch(queries):
+    """
+    Answer a batch of queries with the worker's graph, resolving all of their
+    names at once. Returns the result of `answer` for every query.
+    """
+    start = time.perf_counter()
+    names = [
+        query[field]
+        for query in queries if "error" not in query
+        for field in ("source", "target") if f"{field}_id" not in query and field in query
+    ]
+    try:
+        resolved = name_index.resolve_many(names, SUGGESTIONS)
+    except Exception:
+        # Names are resolved again one query at a time, so only the failing query reports it
+        resolved = {}
+
+    # Every query takes its share of resolving the batch
+    share = (time.perf_counter() - start) / len(queries)
+    results = [answer(query, resolved) for query in queries]
+    for result in results:
+        result["seconds"] += share
+    return results
+
+
+def answer(query, resolved=None):
+    """
+    Answer a single query with the worker's graph, given the result of
+    `NameIndex.resolve_many` for some of its names.
+
+    Returns a dictionary with the query, the degrees of separation and the
+    (movie_id, person_id) path, or an error, and the seconds spent on it.
+    A query that fails is answered with its error, so the server keeps going.
+    """
+    start = time.perf_counter()
+    result = dict(query)
+    if "error" not in result:
+        try:
+            result.update(find_path(query, resolved or {}))
+        except Exception as e:
+            result["error"] = f"{type(e).__name__}: {e}"
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def find_path(query, resolved):
+    """
+    Returns the degrees of separation and path of a query, or its error.
+    """
+    result = {}
+    source = resolve(query, "source", resolved)
+    target = resolve(query, "target", resolved)
+    if isinstance(source, str) and isinstance(target, str):
+        path = graph.shortest_path(source, target)
+        if path is None:
+            result["degrees"] = None
+        else:
+            result["degrees"] = len(path)
+            result["path"] = path
+    else:
+        result.update(source if isinstance(source, dict) else target)
+    return result
+
+
+def resolve(query, field, resolved):
+    """
+    Returns the person id for the `field` ("source" or "target") of a query,
+    or a dictionary with an error if the person can't be told apart.
+    """
+    person_id = query.get(f"{field}_id")
+    if person_id is not None:
+        if person_id in graph.person_index:
+            return person_id
+        return {"error": f"Unknown {field}_id '{person_id}'."}
+
+    name = query.get(field, "")
+    if name not in resolved:
+        resolved.update(name_index.resolve_many([name], SUGGESTIONS))
+    person_ids, suggestions = resolved[name]
+    if len(person_ids) == 0:
+        suggestions = [graph.person(person_ids[0])["name"] for _, person_ids in suggestions]
+        return {"error": f"Person '{name}' not found.", "suggestions": suggestions}
+    elif len(person_ids) > 1:
+        return {"error": f"Which '{name}'? Pass {field}_id, one of: {', '.join(person_ids)}"}
+    return person_ids[0]
+
+
+def print_report(latencies, seconds):
+    """
+    Print query latency percentiles and throughput to stderr.
+    """
+    if not latencies:
+        print("No queries.", file=sys.stderr)
+        return
+
+    latencies = sorted(latencies)
+    print(f"{len(latencies)} queries in {seconds:.3f}s ({len(latencies) / seconds:.1f} queries/s)", file=sys.stderr)
+    for percentile in (50, 90, 99, 100):
+        latency = latencies[min(len(latencies) - 1, len(latencies) * percentile // 100)]
+        print(f"  p{percentile}: {1000 * latency:.3f} ms", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,218 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from bisect import bisect_left
+
+from graph import Graph
+
+# Name of the snapshot file written next to the CSV files
+SNAPSHOT = "degrees.snapshot"
+
+# Bump whenever the layout below changes so old snapshots are rebuilt
+VERSION = 1
+
+MAGIC = b"DEG\0"
+
+# Magic, version, byte order, (mtime_ns, size) of people/movies/stars.csv, people, movies, stars
+HEADER = struct.Struct("<4sII6qqqq4x")
+
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+
+def load_graph(directory):
+    """
+    Return the `Graph` for a directory of CSV files.
+
+    The first load parses the CSV files and writes a binary snapshot next to
+    them. Later loads memory-map that snapshot instead, as long as the CSV
+    files keep the same modification times and sizes.
+    """
+    path = os.path.join(directory, SNAPSHOT)
+    key = csv_key(directory)
+
+    graph = read_snapshot(path, key)
+    if graph is None:
+        graph = Graph.from_csv(directory)
+        try:
+            write_snapshot(graph, path, key)
+        except OSError:
+            # A read-only data directory only costs us the cache
+            pass
+    return graph
+
+
+def csv_key(directory):
+    """
+    Return the (mtime_ns, size) pairs of the CSV files, flattened.
+    """
+    key = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        key.extend((stat.st_mtime_ns, stat.st_size))
+    return tuple(key)
+
+
+def write_snapshot(graph, path, key):
+    """
+    Write `graph` to `path` as a snapshot tagged with the CSV `key`.
+    """
+    person_order = array("i", sorted(range(len(graph.person_ids)), key=graph.person_ids.__getitem__))
+    movie_order = array("i", sorted(range(len(graph.movie_ids)), key=graph.movie_ids.__getitem__))
+
+    # Write to a temporary file first so readers never see half a snapshot
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, byte_order(), *key,
+                            len(graph.person_ids), len(graph.movie_ids), len(graph.person_movies)))
+        for values in (graph.person_offsets, graph.person_movies,
+                       graph.movie_offsets, graph.movie_stars,
+                       graph.name_order, person_order, movie_order):
+            write_array(f, array("i", values))
+        for strings in (graph.person_ids, graph.person_names, graph.person_births,
+                        graph.movie_ids, graph.movie_titles, graph.movie_years):
+            write_strings(f, strings)
+    os.replace(temporary, path)
+
+
+def read_snapshot(path, key):
+    """
+    Memory-map the snapshot at `path` and return its `Graph`.
+
+    Returns None if there is no snapshot, or if it was written by another
+    version or for different CSV files.
+    """
+    try:
+        with open(path, "rb") as f:
+            buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError):
+        return None
+
+    if len(buffer) < HEADER.size:
+        return None
+    header = HEADER.unpack_from(buffer)
+    if header[:3] != (MAGIC, VERSION, byte_order()) or header[3:9] != key:
+        return None
+    people, movies, stars = header[9:]
+
+    view = memoryview(buffer)
+    offset = HEADER.size
+    arrays = []
+    for length in (people + 1, stars, movies + 1, stars, people, people, movies):
+        values, offset = read_array(view, offset, length)
+        arrays.append(values)
+    tables = []
+    for length in (people, people, people, movies, movies, movies):
+        strings, offset = read_strings(view, offset, length)
+        tables.append(strings)
+
+    person_offsets, person_movies, movie_offsets, movie_stars, name_order, person_order, movie_order = arrays
+    person_ids, person_names, person_births, movie_ids, movie_titles, movie_years = tables
+    return Graph(person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_stars,
+                 person_index=SortedIndex(person_ids, person_order),
+                 movie_index=SortedIndex(movie_ids, movie_order),
+                 name_order=name_order)
+
+
+def byte_order():
+    """
+    Return 1 on little-endian machines and 2 on big-endian ones.
+    """
+    return 1 if sys.byteorder == "little" else 2
+
+
+def write_array(f, values):
+    """
+    Write an int array, padded to a multiple of 8 bytes.
+    """
+    data = values.tobytes()
+    f.write(data)
+    f.write(b"\0" * (-len(data) % 8))
+
+
+def read_array(view, offset, length):
+    """
+    Return a zero-copy int view of `length` values at `offset`, and the offset after it.
+    """
+    size = length * 4
+    return view[offset:offset + size].cast("i"), offset + size + (-size % 8)
+
+
+def write_strings(f, strings):
+    """
+    Write a string table: the byte offset of every string, then their UTF-8 bytes.
+    """
+    encoded = [string.encode("utf-8") for string in strings]
+    offsets = array("q", [0])
+    for data in encoded:
+        offsets.append(offsets[-1] + len(data))
+    f.write(offsets.tobytes())
+    blob = b"".join(encoded)
+    f.write(blob)
+    f.write(b"\0" * (-len(blob) % 8))
+
+
+def read_strings(view, offset, length):
+    """
+    Return a `StringTable` of `length` strings at `offset`, and the offset after it.
+    """
+    size = (length + 1) * 8
+    offsets = view[offset:offset + size].cast("q")
+    offset += size
+    blob = view[offset:offset + offsets[length]]
+    offset += offsets[length] + (-offsets[length] % 8)
+    return StringTable(offsets, blob), offset
+
+
+class StringTable():
+    """
+    Read-only sequence of strings decoded from a snapshot on demand.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+
+class SortedIndex():
+    """
+    Read-only mapping from a string to its index in `strings`,
+    found by bisecting `order`, the indexes sorted by their string.
+    """
+
+    def __init__(self, strings, order):
+        self.strings = strings
+        self.order = order
+
+    def __getitem__(self, string):
+        i = bisect_left(self.order, string, key=self.strings.__getitem__)
+        if i < len(self.order) and self.strings[self.order[i]] == string:
+            return self.order[i]
+        raise KeyError(string)
+
+    def get(self, string, default=None):
+        try:
+            return self[string]
+        except KeyError:
+            return default
+
+    def __contains__(self, string):
+        return self.get(string) is not None
+
+    def __len__(self):
+        return len(self.order)
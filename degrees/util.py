@@ -1,4 +1,9 @@
+from collections import deque
+
+
 class Node():
+    __slots__ = ("state", "parent", "action")
+
     def __init__(self, state, parent, action):
         self.state = state
         self.parent = parent
@@ -36,3 +41,79 @@ class QueueFrontier(StackFrontier):
             node = self.frontier[0]
             self.frontier = self.frontier[1:]
             return node
+
+
+class IndexedStackFrontier():
+    """
+    Drop-in replacement for StackFrontier with O(1) add, remove and
+    contains_state, backed by a deque and a count of the states it holds.
+    """
+
+    def __init__(self):
+        self.frontier = deque()
+        self.states = {}
+
+    def add(self, node):
+        self.frontier.append(node)
+        self.states[node.state] = self.states.get(node.state, 0) + 1
+
+    def contains_state(self, state):
+        return state in self.states
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.pop()
+            self.discard(node.state)
+            return node
+
+    def discard(self, state):
+        # The same state may be queued more than once, only forget it with its last node
+        count = self.states[state]
+        if count == 1:
+            del self.states[state]
+        else:
+            self.states[state] = count - 1
+
+
+class IndexedQueueFrontier(IndexedStackFrontier):
+    """
+    Drop-in replacement for QueueFrontier with O(1) add, remove and contains_state.
+    """
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            node = self.frontier.popleft()
+            self.discard(node.state)
+            return node
+
+
+def join_paths(forward, backward, meeting):
+    """
+    Returns the (action, state) path from the source to the target that goes
+    through `meeting`, given the (action, parent) step that reached each state
+    from the source (`forward`) and from the target (`backward`).
+    """
+    path = []
+
+    # Walk back from the meeting point to the source
+    state = meeting
+    while forward[state] is not None:
+        action, parent = forward[state]
+        path.append((action, state))
+        state = parent
+    path.reverse()
+
+    # Walk on from the meeting point to the target
+    state = meeting
+    while backward[state] is not None:
+        action, state = backward[state]
+        path.append((action, state))
+
+    return path
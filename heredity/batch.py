@@ -0,0 +1,109 @@
+import json
+import multiprocessing
+import os
+import sys
+import time
+
+from heredity import load_data
+from inference import InferencePlan
+
+# Families of one pedigree shape handed to a worker at a time
+FAMILIES_PER_TASK = 64
+
+# Inference plans compiled by a worker process, by pedigree shape
+plans = {}
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python batch.py directory")
+    directory = sys.argv[1]
+
+    start = time.perf_counter()
+    groups = group_by_shape(directory)
+    tasks = [
+        (shape, families[first:first + FAMILIES_PER_TASK])
+        for shape, families in groups.items()
+        for first in range(0, len(families), FAMILIES_PER_TASK)
+    ]
+
+    # Results are written as soon as a task is done, one JSON line per family
+    count = 0
+    with multiprocessing.Pool() as pool:
+        for results in pool.imap_unordered(run_families, tasks):
+            for filename, probabilities in results:
+                print(json.dumps({"file": filename, "probabilities": probabilities}), flush=True)
+                count += 1
+    seconds = time.perf_counter() - start
+
+    rate = count / seconds if seconds > 0 else float("inf")
+    print(f"{count} families of {len(groups)} pedigree shapes in {seconds:.3f}s ({rate:.1f} families/s)",
+          file=sys.stderr)
+
+
+def pedigree_shape(people):
+    """
+    Return the shape of a family: for every person in file order, the
+    positions of their mother and father, or None for people without parents
+    in the data. Families with the same shape share an inference plan.
+    """
+    index = {name: i for i, name in enumerate(people)}
+    return tuple(
+        (index[people[name]["mother"]], index[people[name]["father"]])
+        if people[name]["mother"] is not None else None
+        for name in people
+    )
+
+
+def group_by_shape(directory):
+    """
+    Load every CSV file in `directory` and return a dictionary mapping each
+    pedigree shape to a list of (filename, names, traits) for its families.
+    """
+    groups = {}
+    for filename in sorted(os.listdir(directory)):
+        if not filename.endswith(".csv"):
+            continue
+        people = load_data(os.path.join(directory, filename))
+        families = groups.setdefault(pedigree_shape(people), [])
+        families.append((filename, list(people), [people[name]["trait"] for name in people]))
+    return groups
+
+
+def plan_for_shape(shape):
+    """
+    Return the inference plan of a pedigree shape, compiling it on first use.
+    People of the plan are named by their position.
+    """
+    if shape not in plans:
+        people = {
+            str(i): {
+                "name": str(i),
+                "mother": None if parents is None else str(parents[0]),
+                "father": None if parents is None else str(parents[1]),
+                "trait": None
+            }
+            for i, parents in enumerate(shape)
+        }
+        plans[shape] = InferencePlan(people)
+    return plans[shape]
+
+
+def run_families(task):
+    """
+    Run the inference plan of a shape on each of its families' traits.
+    Returns a list of (filename, probabilities) pairs.
+    """
+    shape, families = task
+    plan = plan_for_shape(shape)
+
+    results = []
+    for filename, names, traits in families:
+        evidence = {str(i): {"trait": trait} for i, trait in enumerate(traits)}
+        probabilities = plan.run(evidence)
+        results.append((filename, {name: probabilities[str(i)] for i, name in enumerate(names)}))
+    return results
+
+
+if __name__ == "__main__":
+    main()
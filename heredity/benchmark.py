@@ -0,0 +1,266 @@
+import sys
+import time
+
+import heredity
+from heredity import PROBS
+
+# Number of timed passes over every joint assignment of a family; the fastest pass counts
+ROUNDS = 7
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python benchmark.py data.csv ...")
+
+    print(f"{'family':<20}{'evaluations':>12}{'branches µs':>14}{'table µs':>12}{'speedup':>10}")
+    for filename in sys.argv[1:]:
+        people = heredity.load_data(filename)
+        assignments = joint_assignments(people)
+
+        results = {}
+        for name, function in [
+            ("branches", joint_probability_branches),
+            ("table", heredity.joint_probability),
+        ]:
+            results[name] = benchmark_joint_probability(function, people, assignments)
+
+        # Both versions must agree on every joint probability
+        for old, new in zip(results["branches"]["values"], results["table"]["values"]):
+            if abs(old - new) > 1e-12 * max(abs(old), 1e-300):
+                sys.exit(f"Mismatch in {filename}: {old} != {new}")
+
+        evaluations = len(assignments)
+        branches = 1e6 * results["branches"]["seconds"] / evaluations
+        table = 1e6 * results["table"]["seconds"] / evaluations
+        print(f"{filename:<20}{evaluations:>12}{branches:>14.2f}{table:>12.2f}{branches / table:>9.2f}x")
+
+
+def joint_assignments(people):
+    """
+    Return every (one_gene, two_genes, have_trait) assignment that `heredity.main`
+    evaluates for a family, skipping the ones that fail the trait evidence.
+    """
+    names = set(people)
+    assignments = []
+    for have_trait in heredity.powerset(names):
+        fails_evidence = any(
+            (people[person]["trait"] is not None and
+             people[person]["trait"] != (person in have_trait))
+            for person in names
+        )
+        if fails_evidence:
+            continue
+        for one_gene in heredity.powerset(names):
+            for two_genes in heredity.powerset(names - one_gene):
+                assignments.append((one_gene, two_genes, have_trait))
+    return assignments
+
+
+def benchmark_joint_probability(function, people, assignments):
+    """
+    Time ROUNDS passes of `function` over every assignment.
+    Returns a dictionary with the seconds of the fastest pass and the values it computed.
+    """
+    best = None
+    for _ in range(ROUNDS):
+        start = time.perf_counter()
+        values = [function(people, *assignment) for assignment in assignments]
+        seconds = time.perf_counter() - start
+        if best is None or seconds < best:
+            best = seconds
+    return {"seconds": best, "values": values}
+
+
+def joint_probability_branches(people, one_gene, two_genes, have_trait):
+    """
+    The original `joint_probability`, kept as the baseline: it works out every
+    person's inheritance probability by testing the parents' sets branch by branch.
+
+    The probability returned should be the probability that
+        * everyone in set `one_gene` has one copy of the gene, and
+        * everyone in set `two_genes` has two copies of the gene, and
+        * everyone not in `one_gene` or `two_gene` does not have the gene, and
+        * everyone in set `have_trait` has the trait, and
+        * everyone not in set` have_trait` does not have the trait.
+    """
+    probability = 1
+    zero_gene = people.keys() - (one_gene | two_genes) # Set of people with no genes
+
+    for person in zero_gene:
+        # Getting no genes means that we need to find the probability that each parent will not contribute gene
+
+        if people[person]["mother"] is None:
+            probability *= PROBS["gene"][0]
+        elif people[person]["mother"] is not None:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+
+            if mother in zero_gene and father in zero_gene:
+                # p that person doesn't get gene from mother is 0.99
+                # p that person doesn't get gene from father is 0.99 too
+                probability *= (1 - PROBS["mutation"]) ** 2
+            if mother in zero_gene and father in one_gene:
+                # p that person doesn't get gene from mother is 0.99
+                # p that person doesn't get gene from father is 0.50
+                probability *= (1 - PROBS["mutation"]) * 0.5
+            if mother in zero_gene and father in two_genes:
+                # p that person doesn't get gene from mother is 0.99
+                # p that person doesn't get gene from father is 0.01
+                probability *= (1 - PROBS["mutation"]) * PROBS["mutation"]
+
+            if mother in one_gene and father in zero_gene:
+                # p that person doesn't get gene from mother is 0.5
+                # p that person doesn't get gene from father is 0.99
+                probability *= 0.5 * (1 - PROBS["mutation"])
+            if mother in one_gene and father in one_gene:
+                # p that person doesn't get gene from mother is 0.5
+                # p that person doesn't get gene from father is 0.5 too
+                probability *= 0.5 ** 2
+            if mother in one_gene and father in two_genes:
+                # p that person doesn't get gene from mother is 0.5
+                # p that person doesn't get gene from father is 0.01
+                probability *= 0.5 * PROBS["mutation"]
+
+            if mother in two_genes and father in zero_gene:
+                # p that person doesn't get gene from mother is 0.01
+                # p that person doesnt' get gene from father is 0.99
+                probability *= PROBS["mutation"] * (1 - PROBS["mutation"])
+            if mother in two_genes and father in one_gene:
+                # p that person doesn't get gene from mother is 0.01
+                # p that person doesn't get gene from father is 0.5
+                probability *= PROBS["mutation"] * 0.5
+            if mother in two_genes and father in two_genes:
+                # p that person doesn't get gene from mother is 0.01
+                # p that person doesn't get gene from father is 0.01
+                probability *= PROBS["mutation"] ** 2
+
+        # Multiply by the probability that the person has trait with zero genes
+        probability *= PROBS["trait"][0][person in have_trait]
+
+    for person in one_gene:
+        # Getting one gene means that person should inherit gene only from one of his parents
+        # which means that we need to multiply the probability that it is father who gives the gene or mother, while
+        # the second parent doesn't plus the opposite situation
+        # (mother gives gene * father doesn't give gene) + (mother doesn't give gene * father gives gene)
+
+        if people[person]["mother"] is None:
+            probability *= PROBS["gene"][1]
+        elif people[person]["mother"] is not None:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+
+            # One of parents has zero genes
+            if mother in zero_gene and father in zero_gene:
+                # p that person gets gene from mother or father is 0.01
+                # p that person doesn't get gene from mother or father is 0.99
+                probability *= PROBS["mutation"] * (1 - PROBS["mutation"]) + PROBS["mutation"] * (1 - PROBS["mutation"])
+            if mother in zero_gene and father in one_gene:
+                # p that person gets gene from mother is 0.01
+                # p that person doesn't get gene from father 0.5
+                # p that person gets gene from father 0.5
+                # p that person doesn't get gene from mother is 0.99
+                probability *= PROBS["mutation"] * 0.5 + (1 - PROBS["mutation"]) * 0.5
+            if mother in zero_gene and father in two_genes:
+                # p that person gets gene from mother is 0.01
+                # p that person doesn't get gene from father is 0.01
+                # p that person gets gene from father is 0.99
+                # p that person doesn't get gene from mother is 0.99
+                probability *= PROBS["mutation"] ** 2 + (1 - PROBS["mutation"]) ** 2
+
+            # One of parents has one gene
+            if mother in one_gene and father in zero_gene:
+                # p that person gets gene from mother is 0.5
+                # p that person doesn't get gene from father is 0.99
+                # p that person gets gene from father is 0.01
+                # p that person doesn't get gene from mother is 0.5
+                probability *= (1 - PROBS["mutation"]) * 0.5 + PROBS["mutation"] * 0.5
+            if mother in one_gene and father in one_gene:
+                # p that person gets gene from mother/father is 0.5
+                # p that person doesn't get gene from father/mother is 0.5
+                probability *= 0.5 ** 2 + 0.5 ** 2
+            if mother in one_gene and father in two_genes:
+                # p that person gets gene from mother is 0.5
+                # p that person doesn't get gene from father is 0.01
+                # p that person gets gene from father is 0.99
+                # p that person doesn't get gene from mother is 0.5
+                probability *= 0.5 * PROBS["mutation"] + (1 - PROBS["mutation"]) * 0.5
+
+            # One of parents has two genes
+            if mother in two_genes and father in zero_gene:
+                # p that person gets gene from mother is 0.99
+                # p that person doesn't get gene from father is 0.99
+                # p that person gets gene from father is 0.01
+                # p that person doesn't get gene from mother is 0.01
+                probability *= (1 - PROBS["mutation"]) ** 2 + PROBS["mutation"] ** 2
+            if mother in two_genes and father in one_gene:
+                # p that person gets gene from mother is 0.99
+                # p that person doesn't get gene from father is 0.5
+                # p that person gets gene from father is 0.5
+                # p that person doesn't get gene from mother is 0.01
+                probability *= (1 - PROBS["mutation"]) * 0.5 + PROBS["mutation"] * 0.5
+            if mother in two_genes and father in two_genes:
+                # p that person gets gene from mother is 0.99
+                # p that person doesn't get gene from father is 0.01
+                # p that person gets gene from father is 0.99
+                # p that person doesn't get gene from mother is 0.01
+                probability *= (1 - PROBS["mutation"]) * PROBS["mutation"] + (1 - PROBS["mutation"]) * PROBS["mutation"]
+
+        # Multiply by the probability that the person has trait with one gene
+        probability *= PROBS["trait"][1][person in have_trait]
+
+    for person in two_genes:
+        # Getting two genes means person should inherit genes from both of the parents
+        # which is why we need to find the probability each parent can contribute gene
+
+        if people[person]["mother"] is None:
+            probability *= PROBS["gene"][2]
+        elif people[person]["mother"] is not None:
+            mother = people[person]["mother"]
+            father = people[person]["father"]
+
+            if mother in zero_gene and father in zero_gene:
+                # p that person gets gene from mother is 0.01
+                # p that person gets gene from father is 0.01
+                probability *= PROBS["mutation"] * PROBS["mutation"]
+            if mother in zero_gene and father in one_gene:
+                # p that person gets gene from mother is 0.01
+                # p that person gets gene from father is 0.5
+                probability *= PROBS["mutation"] * 0.5
+            if mother in zero_gene and father in two_genes:
+                # p that person gets gene from mother is 0.01
+                # p that person gets gene from father is 0.99
+                probability *= PROBS["mutation"] * (1 - PROBS["mutation"])
+
+            if mother in one_gene and father in zero_gene:
+                # p that person gets gene from mother is 0.5
+                # p that person gets gene from father is 0.01
+                probability *= 0.5 * PROBS["mutation"]
+            if mother in one_gene and father in one_gene:
+                # p that person gets gene from mother is 0.5
+                # p that person gets gene from father is 0.5
+                probability *= 0.5 * 0.5
+            if mother in one_gene and father in two_genes:
+                # p that person gets gene from mother is 0.5
+                # p that person gets gene from father is 0.99
+                probability *= 0.5 * (1 - PROBS["mutation"])
+            if mother in two_genes and father in zero_gene:
+                # p that person gets gene from mother is 0.99
+                # p that person gets gene from father is 0.01
+                probability *= (1 - PROBS["mutation"]) * PROBS["mutation"]
+            if mother in two_genes and father in one_gene:
+                # p that person gets gene from mother is 0.99
+                # p that person gets gene from father is 0.5
+                probability *= (1 - PROBS["mutation"]) * 0.5
+            if mother in two_genes and father in two_genes:
+                # p that person gets gene from mother is 0.99
+                # p that person gets gene from father is 0.99
+                probability *= (1 - PROBS["mutation"]) ** 2
+
+        # Multiply by the probability that the person has trait with two genes
+        probability *= PROBS["trait"][2][person in have_trait]
+
+    return probability
+
+
+if __name__ == "__main__":
+    main()
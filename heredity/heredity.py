@@ -37,6 +37,44 @@ PROBS = {
 }
 
 
+def passing_probability(genes):
+    """
+    Return the probability that a parent with `genes` copies of the gene
+    passes one copy on to a child, mutation included.
+    """
+    if genes == 2:
+        return 1 - PROBS["mutation"]
+    if genes == 1:
+        return 0.5
+    return PROBS["mutation"]
+
+
+def inheritance_table():
+    """
+    Return a table where `table[mother][father][child]` is the probability
+    that a child has `child` copies of the gene, given its parents' copies.
+    """
+    table = [[[0, 0, 0] for father in range(3)] for mother in range(3)]
+    for mother in range(3):
+        for father in range(3):
+            from_mother = passing_probability(mother)
+            from_father = passing_probability(father)
+
+            # Either both parents pass the gene on, exactly one of them does, or neither
+            table[mother][father][0] = (1 - from_mother) * (1 - from_father)
+            table[mother][father][1] = from_mother * (1 - from_father) + (1 - from_mother) * from_father
+            table[mother][father][2] = from_mother * from_father
+    return table
+
+
+# Probability of a child's number of genes, compiled once from PROBS: INHERITANCE[mother][father][child]
+INHERITANCE = inheritance_table()
+
+# PROBS["gene"] and PROBS["trait"] as lists indexed by the number of genes (and False/True for the trait)
+GENE = [PROBS["gene"][genes] for genes in range(3)]
+TRAIT = [[PROBS["trait"][genes][False], PROBS["trait"][genes][True]] for genes in range(3)]
+
+
 def main():
 
     # Check for proper usage
@@ -60,31 +98,36 @@ def main():
         for person in people
     }
 
-    # Loop over all sets of people who might have the trait
-    names = set(people)
-    for have_trait in powerset(names):
+    # Sets of people are bitmasks: bit i stands for the i-th person in `people`,
+    # which is also the order of `probabilities`
+    everyone = (1 << len(people)) - 1
+    known_traits, with_trait = trait_masks(people)
+    pedigree = pedigree_bits(people)
 
-        # Check if current set of people violates known information
-        fails_evidence = any(
-            (people[person]["trait"] is not None and
-             people[person]["trait"] != (person in have_trait))
-            for person in names
-        )
-        if fails_evidence:
-            continue
+    # Loop over the sets of people who might have the trait, which only vary
+    # in people whose trait is unknown, so none can violate known information
+    for unknown_with_trait in submasks(everyone & ~known_traits):
+        have_trait = with_trait | unknown_with_trait
 
         # Loop over all sets of people who might have the gene
-        for one_gene in powerset(names):
-            for two_genes in powerset(names - one_gene):
+        for one_gene in submasks(everyone):
+            for two_genes in submasks(everyone & ~one_gene):
 
                 # Update probabilities with new joint probability
-                p = joint_probability(people, one_gene, two_genes, have_trait)
+                p = joint_probability_masks(pedigree, one_gene, two_genes, have_trait)
                 update(probabilities, one_gene, two_genes, have_trait, p)
 
     # Ensure probabilities sum to 1
     normalize(probabilities)
 
     # Print results
+    print_probabilities(people, probabilities)
+
+
+def print_probabilities(people, probabilities):
+    """
+    Print the gene and trait distributions of every person.
+    """
     for person in people:
         print(f"{person}:")
         for field in probabilities[person]:
@@ -128,6 +171,49 @@ def powerset(s):
     ]
 
 
+def submasks(mask):
+    """
+    Yield every subset of the bitmask `mask`, from `mask` itself down to 0,
+    without building them all up front.
+    """
+    subset = mask
+    while True:
+        yield subset
+        if subset == 0:
+            return
+        subset = (subset - 1) & mask
+
+
+def trait_masks(people):
+    """
+    Return two bitmasks over `people`: the people whose trait is known,
+    and the people known to have the trait.
+    """
+    known_traits = 0
+    with_trait = 0
+    for i, person in enumerate(people):
+        if people[person]["trait"] is not None:
+            known_traits |= 1 << i
+            if people[person]["trait"]:
+                with_trait |= 1 << i
+    return known_traits, with_trait
+
+
+def pedigree_bits(people):
+    """
+    Return a (person, mother, father) tuple of single-bit masks for every
+    person, bit i standing for the i-th person in `people`, with None for the
+    parents of people without parents in the data.
+
+    The bits are a snapshot of `people`: compile them again after changing it.
+    """
+    bits = {person: 1 << i for i, person in enumerate(people)}
+    return [
+        (bits[person], bits.get(people[person]["mother"]), bits.get(people[person]["father"]))
+        for person in people
+    ]
+
+
 def joint_probability(people, one_gene, two_genes, have_trait):
     """
     Compute and return a joint probability.
@@ -138,182 +224,54 @@ def joint_probability(people, one_gene, two_genes, have_trait):
         * everyone not in `one_gene` or `two_gene` does not have the gene, and
         * everyone in set `have_trait` has the trait, and
         * everyone not in set` have_trait` does not have the trait.
+
+    The sets may also be given as bitmasks, bit i standing for the i-th person
+    in `people`. `main` compiles the pedigree once and calls
+    `joint_probability_masks` instead, rather than once per call.
     """
-    probability = 1
-    zero_gene = people.keys() - (one_gene | two_genes) # Set of people with no genes
-
-    for person in zero_gene:
-        # Getting no genes means that we need to find the probability that each parent will not contribute gene
-
-        if people[person]["mother"] is None:
-            probability *= PROBS["gene"][0]
-        elif people[person]["mother"] is not None:
-            mother = people[person]["mother"]
-            father = people[person]["father"]
-
-            if mother in zero_gene and father in zero_gene:
-                # p that person doesn't get gene from mother is 0.99
-                # p that person doesn't get gene from father is 0.99 too
-                probability *= (1 - PROBS["mutation"]) ** 2
-            if mother in zero_gene and father in one_gene:
-                # p that person doesn't get gene from mother is 0.99
-                # p that person doesn't get gene from father is 0.50
-                probability *= (1 - PROBS["mutation"]) * 0.5
-            if mother in zero_gene and father in two_genes:
-                # p that person doesn't get gene from mother is 0.99
-                # p that person doesn't get gene from father is 0.01
-                probability *= (1 - PROBS["mutation"]) * PROBS["mutation"]
-
-            if mother in one_gene and father in zero_gene:
-                # p that person doesn't get gene from mother is 0.5
-                # p that person doesn't get gene from father is 0.99
-                probability *= 0.5 * (1 - PROBS["mutation"])
-            if mother in one_gene and father in one_gene:
-                # p that person doesn't get gene from mother is 0.5
-                # p that person doesn't get gene from father is 0.5 too
-                probability *= 0.5 ** 2
-            if mother in one_gene and father in two_genes:
-                # p that person doesn't get gene from mother is 0.5
-                # p that person doesn't get gene from father is 0.01
-                probability *= 0.5 * PROBS["mutation"]
-
-            if mother in two_genes and father in zero_gene:
-                # p that person doesn't get gene from mother is 0.01
-                # p that person doesnt' get gene from father is 0.99
-                probability *= PROBS["mutation"] * (1 - PROBS["mutation"])
-            if mother in two_genes and father in one_gene:
-                # p that person doesn't get gene from mother is 0.01
-                # p that person doesn't get gene from father is 0.5
-                probability *= PROBS["mutation"] * 0.5
-            if mother in two_genes and father in two_genes:
-                # p that person doesn't get gene from mother is 0.01
-                # p that person doesn't get gene from father is 0.01
-                probability *= PROBS["mutation"] ** 2
-
-        # Multiply by the probability that the person has trait with zero genes
-        probability *= PROBS["trait"][0][person in have_trait]
+    if isinstance(one_gene, int):
+        return joint_probability_masks(pedigree_bits(people), one_gene, two_genes, have_trait)
 
+    # Number of copies of the gene of every person
+    genes = dict.fromkeys(people, 0)
     for person in one_gene:
-        # Getting one gene means that person should inherit gene only from one of his parents
-        # which means that we need to multiply the probability that it is father who gives the gene or mother, while
-        # the second parent doesn't plus the opposite situation
-        # (mother gives gene * father doesn't give gene) + (mother doesn't give gene * father gives gene)
-
-        if people[person]["mother"] is None:
-            probability *= PROBS["gene"][1]
-        elif people[person]["mother"] is not None:
-            mother = people[person]["mother"]
-            father = people[person]["father"]
-
-            # One of parents has zero genes
-            if mother in zero_gene and father in zero_gene:
-                # p that person gets gene from mother or father is 0.01
-                # p that person doesn't get gene from mother or father is 0.99
-                probability *= PROBS["mutation"] * (1 - PROBS["mutation"]) + PROBS["mutation"] * (1 - PROBS["mutation"])
-            if mother in zero_gene and father in one_gene:
-                # p that person gets gene from mother is 0.01
-                # p that person doesn't get gene from father 0.5
-                # p that person gets gene from father 0.5
-                # p that person doesn't get gene from mother is 0.99
-                probability *= PROBS["mutation"] * 0.5 + (1 - PROBS["mutation"]) * 0.5
-            if mother in zero_gene and father in two_genes:
-                # p that person gets gene from mother is 0.01
-                # p that person doesn't get gene from father is 0.01
-                # p that person gets gene from father is 0.99
-                # p that person doesn't get gene from mother is 0.99
-                probability *= PROBS["mutation"] ** 2 + (1 - PROBS["mutation"]) ** 2
-
-            # One of parents has one gene
-            if mother in one_gene and father in zero_gene:
-                # p that person gets gene from mother is 0.5
-                # p that person doesn't get gene from father is 0.99
-                # p that person gets gene from father is 0.01
-                # p that person doesn't get gene from mother is 0.5
-                probability *= (1 - PROBS["mutation"]) * 0.5 + PROBS["mutation"] * 0.5
-            if mother in one_gene and father in one_gene:
-                # p that person gets gene from mother/father is 0.5
-                # p that person doesn't get gene from father/mother is 0.5
-                probability *= 0.5 ** 2 + 0.5 ** 2
-            if mother in one_gene and father in two_genes:
-                # p that person gets gene from mother is 0.5
-                # p that person doesn't get gene from father is 0.01
-                # p that person gets gene from father is 0.99
-                # p that person doesn't get gene from mother is 0.5
-                probability *= 0.5 * PROBS["mutation"] + (1 - PROBS["mutation"]) * 0.5
-
-            # One of parents has two genes
-            if mother in two_genes and father in zero_gene:
-                # p that person gets gene from mother is 0.99
-                # p that person doesn't get gene from father is 0.99
-                # p that person gets gene from father is 0.01
-                # p that person doesn't get gene from mother is 0.01
-                probability *= (1 - PROBS["mutation"]) ** 2 + PROBS["mutation"] ** 2
-            if mother in two_genes and father in one_gene:
-                # p that person gets gene from mother is 0.99
-                # p that person doesn't get gene from father is 0.5
-                # p that person gets gene from father is 0.5
-                # p that person doesn't get gene from mother is 0.01
-                probability *= (1 - PROBS["mutation"]) * 0.5 + PROBS["mutation"] * 0.5
-            if mother in two_genes and father in two_genes:
-                # p that person gets gene from mother is 0.99
-                # p that person doesn't get gene from father is 0.01
-                # p that person gets gene from father is 0.99
-                # p that person doesn't get gene from mother is 0.01
-                probability *= (1 - PROBS["mutation"]) * PROBS["mutation"] + (1 - PROBS["mutation"]) * PROBS["mutation"]
-
-        # Multiply by the probability that the person has trait with one gene
-        probability *= PROBS["trait"][1][person in have_trait]
-
+        genes[person] = 1
     for person in two_genes:
-        # Getting two genes means person should inherit genes from both of the parents
-        # which is why we need to find the probability each parent can contribute gene
-
-        if people[person]["mother"] is None:
-            probability *= PROBS["gene"][2]
-        elif people[person]["mother"] is not None:
-            mother = people[person]["mother"]
-            father = people[person]["father"]
-
-            if mother in zero_gene and father in zero_gene:
-                # p that person gets gene from mother is 0.01
-                # p that person gets gene from father is 0.01
-                probability *= PROBS["mutation"] * PROBS["mutation"]
-            if mother in zero_gene and father in one_gene:
-                # p that person gets gene from mother is 0.01
-                # p that person gets gene from father is 0.5
-                probability *= PROBS["mutation"] * 0.5
-            if mother in zero_gene and father in two_genes:
-                # p that person gets gene from mother is 0.01
-                # p that person gets gene from father is 0.99
-                probability *= PROBS["mutation"] * (1 - PROBS["mutation"])
-
-            if mother in one_gene and father in zero_gene:
-                # p that person gets gene from mother is 0.5
-                # p that person gets gene from father is 0.01
-                probability *= 0.5 * PROBS["mutation"]
-            if mother in one_gene and father in one_gene:
-                # p that person gets gene from mother is 0.5
-                # p that person gets gene from father is 0.5
-                probability *= 0.5 * 0.5
-            if mother in one_gene and father in two_genes:
-                # p that person gets gene from mother is 0.5
-                # p that person gets gene from father is 0.99
-                probability *= 0.5 * (1 - PROBS["mutation"])
-            if mother in two_genes and father in zero_gene:
-                # p that person gets gene from mother is 0.99
-                # p that person gets gene from father is 0.01
-                probability *= (1 - PROBS["mutation"]) * PROBS["mutation"]
-            if mother in two_genes and father in one_gene:
-                # p that person gets gene from mother is 0.99
-                # p that person gets gene from father is 0.5
-                probability *= (1 - PROBS["mutation"]) * 0.5
-            if mother in two_genes and father in two_genes:
-                # p that person gets gene from mother is 0.99
-                # p that person gets gene from father is 0.99
-                probability *= (1 - PROBS["mutation"]) ** 2
-
-        # Multiply by the probability that the person has trait with two genes
-        probability *= PROBS["trait"][2][person in have_trait]
+        genes[person] = 2
+
+    probability = 1
+    for person, data in people.items():
+        person_genes = genes[person]
+
+        # People without parents in the data get the unconditional probability,
+        # everyone else one lookup by their parents' genes
+        mother = data["mother"]
+        if mother is None:
+            probability *= GENE[person_genes]
+        else:
+            probability *= INHERITANCE[genes[mother]][genes[data["father"]]][person_genes]
+
+        # Multiply by the probability that the person has the trait or not given their genes
+        probability *= TRAIT[person_genes][person in have_trait]
+
+    return probability
+
+
+def joint_probability_masks(pedigree, one_gene, two_genes, have_trait):
+    """
+    `joint_probability` for sets given as bitmasks, over the `pedigree`
+    returned by `pedigree_bits`.
+    """
+    probability = 1
+    for person, mother, father in pedigree:
+        person_genes = 1 if one_gene & person else 2 if two_genes & person else 0
+        if mother is None:
+            probability *= GENE[person_genes]
+        else:
+            mother_genes = 1 if one_gene & mother else 2 if two_genes & mother else 0
+            father_genes = 1 if one_gene & father else 2 if two_genes & father else 0
+            probability *= INHERITANCE[mother_genes][father_genes][person_genes]
+        probability *= TRAIT[person_genes][1 if have_trait & person else 0]
 
     return probability
 
@@ -324,7 +282,18 @@ def update(probabilities, one_gene, two_genes, have_trait, p):
     Each person should have their "gene" and "trait" distributions updated.
     Which value for each distribution is updated depends on whether
     the person is in `have_gene` and `have_trait`, respectively.
+    The sets may also be given as bitmasks, bit i standing for the i-th person
+    in `probabilities`, which must list people in the same order as the
+    `people` the masks were built from (as `main` does).
     """
+    if isinstance(one_gene, int):
+        bit = 1
+        for person in probabilities:
+            probabilities[person]["gene"][1 if one_gene & bit else 2 if two_genes & bit else 0] += p
+            probabilities[person]["trait"][have_trait & bit != 0] += p
+            bit <<= 1
+        return
+
     for person in probabilities:
 
         # if person has one gene, add the joint probability p to them and so on
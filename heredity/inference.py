@@ -0,0 +1,251 @@
+import heapq
+import itertools
+import sys
+
+from heredity import INHERITANCE, PROBS, load_data, print_probabilities
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python inference.py data.csv")
+    people = load_data(sys.argv[1])
+
+    # Same results as heredity.py, without enumerating every joint assignment
+    probabilities = infer(people)
+    print_probabilities(people, probabilities)
+
+
+def infer(people):
+    """
+    Return the gene and trait distribution of every person in `people`,
+    in the same form as `heredity.main` computes them, by exact inference
+    over a junction tree of the pedigree.
+    """
+    return InferencePlan(people).run(people)
+
+
+class InferencePlan():
+    """
+    Junction tree of a pedigree, compiled once and run for any trait evidence.
+
+    Every person is a gene variable with values 0, 1 and 2. The pedigree is
+    moralized (parents of a child are joined), and people are eliminated one
+    by one, always choosing the person that adds the fewest new edges. The
+    clique formed when eliminating a person becomes its node in the tree, and
+    its parent node is the clique of the first person eliminated after it
+    among its neighbours. For pedigrees without loops every clique has at
+    most three people, so inference takes time linear in the family size.
+
+    Traits are leaves of their person's gene, so observed traits only weigh
+    that person's factor, and unobserved ones are filled in from the gene.
+    """
+
+    def __init__(self, people):
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+
+        # The family factor of a person covers their gene and their parents' genes
+        self.parents = [
+            (index[people[name]["mother"]], index[people[name]["father"]])
+            if people[name]["mother"] is not None else None
+            for name in self.names
+        ]
+        scopes = [
+            (person,) if parents is None else (person,) + parents
+            for person, parents in enumerate(self.parents)
+        ]
+
+        # Moralize: everyone in a family factor is a neighbour of everyone else in it
+        neighbours = [set() for _ in self.names]
+        for scope in scopes:
+            for a, b in itertools.permutations(scope, 2):
+                neighbours[a].add(b)
+
+        # Eliminate people by the min-fill heuristic, recording the clique of each. Scores are
+        # kept in a heap; an elimination only changes the scores of people up to two steps away
+        self.order = []
+        self.cliques = [None] * len(self.names)
+        scores = [score(neighbours, person) for person in range(len(self.names))]
+        heap = list(scores)
+        heapq.heapify(heap)
+        while heap:
+            entry = heapq.heappop(heap)
+            person = entry[2]
+            if self.cliques[person] is not None or entry != scores[person]:
+                continue
+
+            others = neighbours[person]
+            for a, b in itertools.combinations(others, 2):
+                neighbours[a].add(b)
+                neighbours[b].add(a)
+            for other in others:
+                neighbours[other].discard(person)
+
+            # The eliminated person comes first in their clique
+            self.cliques[person] = (person,) + tuple(sorted(others))
+            self.order.append(person)
+
+            affected = set(others).union(*(neighbours[other] for other in others))
+            for other in affected:
+                scores[other] = score(neighbours, other)
+                heapq.heappush(heap, scores[other])
+
+        # The parent of a clique is the clique of the first of its other people to be eliminated
+        position = {person: i for i, person in enumerate(self.order)}
+        self.parent = [None] * len(self.names)
+        self.children = [[] for _ in self.names]
+        for person, clique in enumerate(self.cliques):
+            if len(clique) > 1:
+                parent = min(clique[1:], key=position.__getitem__)
+                self.parent[person] = parent
+                self.children[parent].append(person)
+
+        # A family factor goes to the clique of its first eliminated person, which contains all of it
+        self.factors = [[] for _ in self.names]
+        for person, scope in enumerate(scopes):
+            self.factors[min(scope, key=position.__getitem__)].append(person)
+
+        # For every assignment of every clique, precompute where it reads and writes:
+        # the index into its own separator and into each child's separator
+        self.assignments = []
+        self.separator_index = []
+        self.child_index = []
+        for person, clique in enumerate(self.cliques):
+            assignments = list(itertools.product(range(3), repeat=len(clique)))
+            slot = {variable: i for i, variable in enumerate(clique)}
+            self.assignments.append(assignments)
+            self.separator_index.append([flat_index(a[1:]) for a in assignments])
+            self.child_index.append([
+                [flat_index([a[slot[variable]] for variable in self.cliques[child][1:]]) for a in assignments]
+                for child in self.children[person]
+            ])
+        self.slots = [
+            [(slot_of(clique, person),) + tuple(slot_of(clique, p) for p in (self.parents[person] or ()))
+             for person in self.factors[i]]
+            for i, clique in enumerate(self.cliques)
+        ]
+
+    def potentials(self, people):
+        """
+        Return every clique's table of family factors, weighted by the trait evidence.
+        """
+        likelihood = []
+        for name in self.names:
+            trait = people[name]["trait"]
+            likelihood.append([1 if trait is None else PROBS["trait"][genes][trait] for genes in range(3)])
+
+        potentials = []
+        for i, assignments in enumerate(self.assignments):
+            values = []
+            for a in assignments:
+                value = 1
+                for person, slots in zip(self.factors[i], self.slots[i]):
+                    genes = a[slots[0]]
+                    if self.parents[person] is None:
+                        value *= PROBS["gene"][genes]
+                    else:
+                        value *= INHERITANCE[a[slots[1]]][a[slots[2]]][genes]
+                    value *= likelihood[person][genes]
+                values.append(value)
+            potentials.append(values)
+        return potentials
+
+    def run(self, people):
+        """
+        Return the gene and trait distribution of every person, given the
+        traits in `people`, a family with the same pedigree as the plan.
+        """
+        potentials = self.potentials(people)
+
+        # Collect messages from the leaves of the tree towards the roots
+        upward = [None] * len(self.names)
+        for i in self.order:
+            message = [0] * 3 ** (len(self.cliques[i]) - 1)
+            for k, value in enumerate(potentials[i]):
+                for child, index in zip(self.children[i], self.child_index[i]):
+                    value *= upward[child][index[k]]
+                message[self.separator_index[i][k]] += value
+            upward[i] = scaled(message)
+
+        # Distribute messages from the roots back to the leaves
+        downward = [None] * len(self.names)
+        for i in reversed(self.order):
+            incoming = []
+            for k, value in enumerate(potentials[i]):
+                if self.parent[i] is not None:
+                    value *= downward[i][self.separator_index[i][k]]
+                incoming.append(value)
+            for j, child in enumerate(self.children[i]):
+                message = [0] * 3 ** (len(self.cliques[child]) - 1)
+                for k, value in enumerate(incoming):
+                    for other, index in zip(self.children[i], self.child_index[i]):
+                        if other != child:
+                            value *= upward[other][index[k]]
+                    message[self.child_index[i][j][k]] += value
+                downward[child] = scaled(message)
+
+        # A person's gene distribution is the belief of their clique, summed over the others in it
+        probabilities = {}
+        for i, name in enumerate(self.names):
+            genes = [0, 0, 0]
+            for k, a in enumerate(self.assignments[i]):
+                value = potentials[i][k]
+                if self.parent[i] is not None:
+                    value *= downward[i][self.separator_index[i][k]]
+                for child, index in zip(self.children[i], self.child_index[i]):
+                    value *= upward[child][index[k]]
+                genes[a[0]] += value
+            total = sum(genes)
+
+            gene = {2: genes[2] / total, 1: genes[1] / total, 0: genes[0] / total}
+            trait = people[name]["trait"]
+            if trait is None:
+                has_trait = sum(gene[g] * PROBS["trait"][g][True] for g in gene)
+                probabilities[name] = {"gene": gene, "trait": {True: has_trait, False: 1 - has_trait}}
+            else:
+                probabilities[name] = {"gene": gene, "trait": {True: float(trait), False: float(not trait)}}
+        return probabilities
+
+
+def score(neighbours, person):
+    """
+    Return the elimination score of `person`: the number of edges eliminating
+    them would add between their neighbours, then their number of neighbours.
+    """
+    fill_in = sum(
+        1 for a, b in itertools.combinations(neighbours[person], 2)
+        if b not in neighbours[a]
+    )
+    return (fill_in, len(neighbours[person]), person)
+
+
+def scaled(message):
+    """
+    Return a message scaled to sum to 1. Beliefs are normalized in the end
+    anyway, and this keeps products over large families from underflowing.
+    """
+    total = sum(message)
+    return [value / total for value in message]
+
+
+def flat_index(genes):
+    """
+    Return the index of an assignment of genes in a table over its variables, base 3.
+    """
+    index = 0
+    for value in genes:
+        index = index * 3 + value
+    return index
+
+
+def slot_of(clique, person):
+    """
+    Return the position of `person` in `clique`.
+    """
+    return clique.index(person)
+
+
+if __name__ == "__main__":
+    main()
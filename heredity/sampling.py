@@ -0,0 +1,355 @@
+import math
+import multiprocessing
+import os
+import random
+import sys
+
+from heredity import GENE, INHERITANCE, TRAIT, load_data
+from inference import infer
+
+METHODS = ("gibbs", "likelihood")
+
+# Samples drawn by every chain: Gibbs sweeps over all people, or weighted samples
+SAMPLES = 20000
+
+# Gibbs sweeps discarded at the start of every chain
+BURN_IN = 1000
+
+# Least number of chains run, so that there is a spread between them to report
+CHAINS = 4
+
+# Largest acceptable difference from exact inference in standard errors, plus a small absolute slack
+CHECK_ERRORS = 5
+CHECK_SLACK = 0.005
+
+
+def main():
+    usage = f"Usage: python sampling.py {'|'.join(METHODS)} data.csv [samples] | check data.csv ..."
+    if len(sys.argv) < 3 or sys.argv[1] not in METHODS + ("check",):
+        sys.exit(usage)
+
+    if sys.argv[1] == "check":
+        failures = 0
+        for filename in sys.argv[2:]:
+            failures += check(filename)
+        if failures:
+            sys.exit(f"{failures} estimates too far from exact inference.")
+        return
+
+    if len(sys.argv) > 4:
+        sys.exit(usage)
+    people = load_data(sys.argv[2])
+    samples = int(sys.argv[3]) if len(sys.argv) == 4 else SAMPLES
+
+    estimates = sample(people, sys.argv[1], samples)
+    print_estimates(people, estimates)
+
+
+def sample(people, method="gibbs", samples=SAMPLES, chains=None, seed=None):
+    """
+    Estimate the gene and trait distribution of every person with
+    `chains` independent chains of `method`, run across a process pool.
+
+    - "gibbs": Gibbs sampling of every person's gene given everyone else's
+    - "likelihood": likelihood weighting, sampling genes from parents to
+      children and weighing every sample by the likelihood of known traits
+
+    Returns a dictionary with "probabilities", in the same form as
+    `heredity.main` computes them, "errors", the standard error of every one
+    of those probabilities from the spread between chains, and "diagnostics":
+    the Gelman-Rubin R-hat of the gene probabilities for Gibbs sampling (close
+    to 1 once chains agree), and the effective sample size for both methods
+    (for Gibbs sampling, of the least well estimated gene probability).
+    """
+    if method not in METHODS:
+        raise ValueError(f"unknown method '{method}', expected one of {', '.join(METHODS)}")
+    pedigree = Pedigree(people)
+    chains = chains or max(CHAINS, os.cpu_count() or 1)
+    if seed is None:
+        seed = random.randrange(2 ** 32)
+
+    tasks = [(pedigree, method, samples, seed + chain) for chain in range(chains)]
+    with multiprocessing.Pool(min(chains, os.cpu_count() or 1)) as pool:
+        results = pool.starmap(run_chain, tasks)
+
+    # Every chain estimates every probability; combine them by their mean and spread
+    n = len(pedigree.names)
+    probabilities = {}
+    errors = {}
+    for i, name in enumerate(pedigree.names):
+        values = {field: {} for field in ("gene", "trait")}
+        spreads = {field: {} for field in ("gene", "trait")}
+        for field, keys in (("gene", (2, 1, 0)), ("trait", (True, False))):
+            for key in keys:
+                estimates = [chain_probability(result, pedigree, i, field, key) for result in results]
+                mean = sum(estimates) / chains
+                variance = sum((estimate - mean) ** 2 for estimate in estimates) / (chains - 1) if chains > 1 else 0
+                values[field][key] = mean
+                spreads[field][key] = math.sqrt(variance / chains)
+        probabilities[name] = values
+        errors[name] = spreads
+
+    diagnostics = {"chains": chains, "samples": samples * chains}
+    if method == "likelihood":
+        diagnostics["effective_samples"] = sum(result["effective_samples"] for result in results)
+    else:
+        diagnostics["r_hat"] = max(
+            gelman_rubin([result["means"][i][genes] for result in results],
+                         [result["variances"][i][genes] for result in results], samples)
+            for i in range(n) for genes in range(3)
+        )
+
+        # Correlated sweeps are worth fewer independent samples: compare the variance of one
+        # sweep's value with the variance of the mean over all of them, for the worst probability
+        effective = []
+        for i, name in enumerate(pedigree.names):
+            for genes in range(3):
+                within = sum(result["variances"][i][genes] for result in results) / chains
+                error = errors[name]["gene"][genes]
+                if within > 0 and error > 0:
+                    effective.append(within / error ** 2)
+        diagnostics["effective_samples"] = min(min(effective, default=samples * chains), samples * chains)
+    return {"probabilities": probabilities, "errors": errors, "diagnostics": diagnostics}
+
+
+def chain_probability(result, pedigree, person, field, key):
+    """
+    Return one chain's estimate of P(field = key) for `person`.
+    An unknown trait is read off the chain's gene distribution.
+    """
+    genes = result["means"][person]
+    if field == "gene":
+        return genes[key]
+    trait = pedigree.traits[person]
+    if trait is not None:
+        return float(trait == key)
+    return sum(genes[g] * TRAIT[g][key] for g in range(3))
+
+
+class Pedigree():
+    """
+    People of a family by index, with their parents, children and known
+    traits, in a form that is cheap to send to worker processes.
+    """
+
+    def __init__(self, people):
+        self.names = list(people)
+        index = {name: i for i, name in enumerate(self.names)}
+        self.parents = [
+            (index[people[name]["mother"]], index[people[name]["father"]])
+            if people[name]["mother"] is not None else None
+            for name in self.names
+        ]
+        self.traits = [people[name]["trait"] for name in self.names]
+
+        # Children of every person, for the factors a Gibbs update touches
+        self.children = [[] for _ in self.names]
+        for child, parents in enumerate(self.parents):
+            if parents is not None:
+                for parent in parents:
+                    self.children[parent].append(child)
+
+        # Parents come before their children in `order`
+        self.order = []
+        placed = [False] * len(self.names)
+        for person in range(len(self.names)):
+            stack = [person]
+            while stack:
+                current = stack[-1]
+                pending = [p for p in (self.parents[current] or ()) if not placed[p]]
+                if pending:
+                    stack.extend(pending)
+                    continue
+                stack.pop()
+                if not placed[current]:
+                    placed[current] = True
+                    self.order.append(current)
+
+    def likelihood(self, person, genes):
+        """
+        Return the probability of the known trait of `person` given their genes, or 1.
+        """
+        trait = self.traits[person]
+        return 1 if trait is None else TRAIT[genes][trait]
+
+    def log_likelihood(self, person, genes):
+        """
+        Return the log of `likelihood`.
+        """
+        trait = self.traits[person]
+        return 0.0 if trait is None else math.log(TRAIT[genes][trait])
+
+    def forward_sample(self, rng):
+        """
+        Return genes for everyone drawn from the model, parents before children.
+        """
+        genes = [0] * len(self.names)
+        for person in self.order:
+            genes[person] = draw(rng, self.prior(person, genes))
+        return genes
+
+    def prior(self, person, genes):
+        """
+        Return the distribution of a person's genes given their parents' genes.
+        """
+        parents = self.parents[person]
+        if parents is None:
+            return GENE
+        return INHERITANCE[genes[parents[0]]][genes[parents[1]]]
+
+
+def run_chain(pedigree, method, samples, seed):
+    """
+    Run one chain and return its per-person gene probability estimates
+    ("means"), and either its effective sample size for likelihood weighting
+    or the variance of the per-sweep values the estimates average
+    ("variances") for Gibbs sampling.
+    """
+    rng = random.Random(seed)
+    n = len(pedigree.names)
+    sums = [[0.0] * 3 for _ in range(n)]
+    squares = [[0.0] * 3 for _ in range(n)]
+
+    if method == "likelihood":
+        # Weights are kept in log space relative to the largest so far, since a
+        # product over hundreds of known traits underflows
+        shift = None
+        total = 0.0
+        total_squared = 0.0
+        for _ in range(samples):
+            genes = pedigree.forward_sample(rng)
+            log_weight = sum(pedigree.log_likelihood(person, genes[person]) for person in range(n))
+            if shift is None or log_weight > shift:
+                scale = 0.0 if shift is None else math.exp(shift - log_weight)
+                shift = log_weight
+                total *= scale
+                total_squared *= scale * scale
+                sums = [[value * scale for value in row] for row in sums]
+
+            weight = math.exp(log_weight - shift)
+            total += weight
+            total_squared += weight * weight
+            for person in range(n):
+                sums[person][genes[person]] += weight
+
+        return {
+            "means": [[value / total for value in row] for row in sums],
+            "effective_samples": total * total / total_squared
+        }
+
+    genes = pedigree.forward_sample(rng)
+    for sweep in range(BURN_IN + samples):
+        for person in range(n):
+            conditional = gibbs_conditional(pedigree, genes, person)
+            genes[person] = draw(rng, conditional)
+
+            # Rao-Blackwellize: average the conditional distribution rather than the draw
+            if sweep >= BURN_IN:
+                for value in range(3):
+                    sums[person][value] += conditional[value]
+                    squares[person][value] += conditional[value] ** 2
+
+    means = [[value / samples for value in row] for row in sums]
+    variances = [
+        [max(squares[person][value] / samples - means[person][value] ** 2, 0) for value in range(3)]
+        for person in range(n)
+    ]
+    return {"means": means, "variances": variances}
+
+
+def gibbs_conditional(pedigree, genes, person):
+    """
+    Return the distribution of a person's genes given everyone else's genes
+    and the known traits: their own inheritance and trait factors, times the
+    inheritance factors of their children.
+    """
+    current = genes[person]
+    weights = []
+    for value in range(3):
+        genes[person] = value
+        weight = pedigree.prior(person, genes)[value] * pedigree.likelihood(person, value)
+        for child in pedigree.children[person]:
+            weight *= pedigree.prior(child, genes)[genes[child]]
+        weights.append(weight)
+    genes[person] = current
+
+    total = sum(weights)
+    return [weight / total for weight in weights]
+
+
+def draw(rng, distribution):
+    """
+    Return 0, 1 or 2 drawn from a distribution over those values.
+    """
+    threshold = rng.random() * sum(distribution)
+    if threshold < distribution[0]:
+        return 0
+    if threshold < distribution[0] + distribution[1]:
+        return 1
+    return 2
+
+
+def gelman_rubin(means, variances, samples):
+    """
+    Return the Gelman-Rubin potential scale reduction factor R-hat of one
+    quantity from every chain's mean and variance over `samples` draws.
+    """
+    chains = len(means)
+    if chains < 2:
+        return float("nan")
+    mean = sum(means) / chains
+    between = samples * sum((m - mean) ** 2 for m in means) / (chains - 1)
+    within = sum(variances) / chains
+    if within == 0:
+        return 1.0
+    pooled = (samples - 1) / samples * within + between / samples
+    return math.sqrt(pooled / within)
+
+
+def print_estimates(people, estimates):
+    """
+    Print every person's gene and trait distribution with its standard error,
+    followed by the convergence diagnostics.
+    """
+    probabilities = estimates["probabilities"]
+    errors = estimates["errors"]
+    for person in people:
+        print(f"{person}:")
+        for field in probabilities[person]:
+            print(f"  {field.capitalize()}:")
+            for value in probabilities[person][field]:
+                p = probabilities[person][field][value]
+                print(f"    {value}: {p:.4f} ± {errors[person][field][value]:.4f}")
+
+    diagnostics = estimates["diagnostics"]
+    print(f"Chains: {diagnostics['chains']}, samples: {diagnostics['samples']}, "
+          f"effective samples: {diagnostics['effective_samples']:.0f}")
+    if "r_hat" in diagnostics:
+        print(f"Largest R-hat: {diagnostics['r_hat']:.4f}")
+
+
+def check(filename, samples=SAMPLES, seed=0):
+    """
+    Compare both sampling methods with exact inference on a family file.
+    Print the largest error of each, and return the number of estimates
+    further than CHECK_ERRORS standard errors (plus CHECK_SLACK) from exact.
+    """
+    people = load_data(filename)
+    exact = infer(people)
+    failures = 0
+    for method in METHODS:
+        estimates = sample(people, method, samples, seed=seed)
+        largest = 0
+        for person in people:
+            for field in exact[person]:
+                for value in exact[person][field]:
+                    error = abs(estimates["probabilities"][person][field][value] - exact[person][field][value])
+                    largest = max(largest, error)
+                    if error > CHECK_ERRORS * estimates["errors"][person][field][value] + CHECK_SLACK:
+                        failures += 1
+        print(f"{filename} {method}: largest error {largest:.4f}")
+    return failures
+
+
+if __name__ == "__main__":
+    main()
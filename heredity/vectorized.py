@@ -0,0 +1,100 @@
+import sys
+
+import numpy as np
+
+from heredity import GENE, INHERITANCE, TRAIT, load_data, print_probabilities
+
+# Joint gene assignments evaluated together, 3 ** 10
+BATCH = 59049
+
+LOG_GENE = np.log(np.array(GENE))
+LOG_INHERITANCE = np.log(np.array(INHERITANCE))
+LOG_TRAIT = np.log(np.array(TRAIT))
+
+
+def main():
+
+    # Check for proper usage
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python vectorized.py data.csv")
+    people = load_data(sys.argv[1])
+
+    # Same results as heredity.py, enumerated in NumPy batches in log space
+    probabilities = enumerate_log_space(people)
+    print_probabilities(people, probabilities)
+
+
+def enumerate_log_space(people, batch=BATCH):
+    """
+    Return the gene and trait distribution of every person in `people`, in
+    the same form as `heredity.main` computes them, by enumerating every
+    joint gene assignment with NumPy.
+
+    Assignment `i` gives person `p` the `p`-th base-3 digit of `i` as their
+    number of genes. Log joint probabilities are computed a batch at a time,
+    and every person's gene marginals are accumulated by log-sum-exp.
+
+    Traits are not enumerated: an observed trait adds its log likelihood to
+    the joint, masked to the people whose trait is known, and an unobserved
+    trait sums to 1 over its two values, so it drops out until its marginal
+    is read off the person's gene distribution at the end.
+    """
+    names = list(people)
+    n = len(names)
+    index = {name: i for i, name in enumerate(names)}
+
+    founders = np.array([people[name]["mother"] is None for name in names])
+    mothers = np.array([index.get(people[name]["mother"], 0) for name in names])
+    fathers = np.array([index.get(people[name]["father"], 0) for name in names])
+    children = ~founders
+
+    # Evidence as masks: which traits are known, and their values
+    observed = np.array([people[name]["trait"] is not None for name in names])
+    traits = np.array([bool(people[name]["trait"]) for name in names], dtype=np.int64)
+
+    # log P(genes = g) summed over a batch, for every person and g
+    log_marginals = np.full((n, 3), -np.inf)
+    powers = 3 ** np.arange(n, dtype=np.int64)
+    total = 3 ** n
+    for first in range(0, total, batch):
+        assignments = np.arange(first, min(first + batch, total), dtype=np.int64)
+        genes = assignments[:, np.newaxis] // powers % 3
+
+        log_joint = (
+            np.where(founders, LOG_GENE[genes], 0).sum(axis=1)
+            + np.where(children, LOG_INHERITANCE[genes[:, mothers], genes[:, fathers], genes], 0).sum(axis=1)
+            + np.where(observed, LOG_TRAIT[genes, traits], 0).sum(axis=1)
+        )
+
+        for value in range(3):
+            selected = np.where(genes == value, log_joint[:, np.newaxis], -np.inf)
+            log_marginals[:, value] = np.logaddexp(log_marginals[:, value], logsumexp(selected, axis=0))
+
+    # Normalize every person's distribution in log space
+    log_marginals -= logsumexp(log_marginals, axis=1)[:, np.newaxis]
+    gene_marginals = np.exp(log_marginals)
+
+    probabilities = {}
+    for i, name in enumerate(names):
+        gene = {2: float(gene_marginals[i, 2]), 1: float(gene_marginals[i, 1]), 0: float(gene_marginals[i, 0])}
+        if observed[i]:
+            trait = people[name]["trait"]
+            probabilities[name] = {"gene": gene, "trait": {True: float(trait), False: float(not trait)}}
+        else:
+            has_trait = float(np.dot(gene_marginals[i], np.exp(LOG_TRAIT[:, 1])))
+            probabilities[name] = {"gene": gene, "trait": {True: has_trait, False: 1 - has_trait}}
+    return probabilities
+
+
+def logsumexp(values, axis):
+    """
+    Return log(sum(exp(values))) along `axis`, without overflow or underflow.
+    """
+    peak = values.max(axis=axis, keepdims=True)
+    peak = np.where(np.isfinite(peak), peak, 0)
+    with np.errstate(divide="ignore"):
+        return np.log(np.exp(values - peak).sum(axis=axis)) + np.squeeze(peak, axis=axis)
+
+
+if __name__ == "__main__":
+    main()
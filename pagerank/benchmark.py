@@ -0,0 +1,183 @@
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import tempfile
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+import generate
+from crawler import crawl_parallel
+from engine import LinkGraph, iterate_pagerank_sparse, sample_pagerank_vectorized
+from pagerank import DAMPING, SAMPLES, crawl, iterate_pagerank, sample_pagerank
+from solvers import peak_memory, solve_pagerank
+from store import load_corpus, load_store, write_store
+
+# Corpus sizes benchmarked by default
+SIZES = (1000, 10000, 100000)
+
+# The dictionary implementations are quadratic in the number of pages, so skip them past this size
+DICTIONARY_LIMIT = 1000
+
+# Only write HTML corpora (and time crawling them) up to this many pages; larger graphs start from edges
+HTML_LIMIT = 100000
+
+# Samples per page taken by the vectorized sampler
+SAMPLES_PER_PAGE = 10
+
+# Benchmarks run on every graph, with whether they need an HTML corpus and whether they are dictionary based
+BENCHMARKS = {
+    "crawl": (True, False),
+    "crawl_parallel": (True, False),
+    "sample_pagerank": (False, True),
+    "iterate_pagerank": (False, True),
+    "sample_pagerank_vectorized": (False, False),
+    "iterate_pagerank_sparse": (False, False),
+    "solve_pagerank[gauss-seidel]": (False, False),
+    "solve_pagerank[extrapolated]": (False, False),
+}
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit(f"Usage: python benchmark.py results.json [{'|'.join(generate.MODELS)}|all] [pages ...]")
+    results_file = sys.argv[1]
+    models = generate.MODELS
+    sizes = SIZES
+    arguments = sys.argv[2:]
+    if arguments and not arguments[0].isdigit():
+        if arguments[0] not in generate.MODELS + ("all",):
+            sys.exit(f"Unknown model '{arguments[0]}'.")
+        if arguments[0] != "all":
+            models = (arguments[0],)
+        arguments = arguments[1:]
+    if arguments:
+        sizes = tuple(int(size) for size in arguments)
+
+    run = {
+        "started": time.strftime("%Y-%m-%dT%H:%M:%S"),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "results": []
+    }
+    print(f"{'model':<12}{'pages':>10}{'links':>12}  {'benchmark':<30}{'seconds':>10}{'throughput':>16}{'peak MiB':>10}")
+    for model in models:
+        for pages in sizes:
+            for result in benchmark_graph(model, pages):
+                run["results"].append(result)
+                peak = "-" if result["peak_rss"] is None else f"{result['peak_rss'] / 1024:.0f}"
+                print(f"{model:<12}{pages:>10}{result['links']:>12}  {result['benchmark']:<30}"
+                      f"{result['seconds']:>10.3f}{result['throughput']:>12.0f} {result['unit']:<3}{peak:>10}")
+
+    save_run(results_file, run)
+
+
+def save_run(filename, run):
+    """
+    Append a benchmark run to the list of runs in a JSON results file.
+    """
+    runs = []
+    if os.path.exists(filename):
+        with open(filename, encoding="utf-8") as f:
+            runs = json.load(f)
+    runs.append(run)
+    with open(filename, "w", encoding="utf-8") as f:
+        json.dump(runs, f, indent=2)
+
+
+def benchmark_graph(model, pages, seed=0):
+    """
+    Generate a synthetic graph and time every benchmark that fits its size.
+    Return a list of result dictionaries.
+    """
+    sources, targets = generate.generate_edges(model, pages, seed=seed)
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        corpus = os.path.join(directory, "corpus")
+        if pages <= HTML_LIMIT:
+            generate.write_corpus(corpus, pages, sources, targets)
+
+        # Every benchmark process memory-maps the same store instead of parsing HTML
+        store = os.path.join(directory, "links.store")
+        write_store(link_graph(pages, sources, targets), store)
+
+        for name, (needs_html, dictionary) in BENCHMARKS.items():
+            if needs_html and pages > HTML_LIMIT or dictionary and pages > DICTIONARY_LIMIT:
+                continue
+
+            # A fresh process per benchmark, so its peak memory is its own
+            with ProcessPoolExecutor(1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                result = executor.submit(run_benchmark, name, corpus, store).result()
+            result.update(model=model, pages=pages, links=len(sources), benchmark=name)
+            results.append(result)
+    return results
+
+
+def link_graph(pages, sources, targets):
+    """
+    Return the `LinkGraph` of generated links, with pages renumbered in the
+    sorted order of their names as the store requires.
+    """
+    names = sorted(generate.page_name(i) for i in range(pages))
+    renumbered = np.empty(pages, dtype=np.int64)
+    renumbered[[int(name[:-len(".html")]) for name in names]] = np.arange(pages)
+
+    sources, targets = renumbered[sources], renumbered[targets]
+    order = np.lexsort((targets, sources))
+    indptr = np.zeros(pages + 1, dtype=np.int64)
+    np.cumsum(np.bincount(sources, minlength=pages), out=indptr[1:])
+    return LinkGraph(names, indptr, targets[order].astype(np.int32))
+
+
+def run_benchmark(name, corpus, store):
+    """
+    Load the input of benchmark `name` and time it.
+    Return its seconds, throughput and the peak memory of the process in KiB.
+    """
+    pages = len(load_store(store))
+    if name in ("crawl", "crawl_parallel"):
+        function = crawl if name == "crawl" else crawl_parallel
+        seconds = timed(function, corpus)
+        throughput, unit = pages / seconds, "pages/s"
+    elif name in ("sample_pagerank", "iterate_pagerank"):
+        # The dictionary implementations get the plain dictionary that `crawl` returns
+        links = {page: set(linked) for page, linked in load_corpus(store).items()}
+        if name == "sample_pagerank":
+            seconds = timed(sample_pagerank, links, DAMPING, SAMPLES)
+            throughput, unit = SAMPLES / seconds, "samples/s"
+        else:
+            seconds = timed(iterate_pagerank, links, DAMPING)
+            throughput, unit = pages / seconds, "pages/s"
+    else:
+        graph = load_store(store)
+        if name == "sample_pagerank_vectorized":
+            samples = SAMPLES_PER_PAGE * pages
+            seconds = timed(sample_pagerank_vectorized, graph, DAMPING, samples)
+            throughput, unit = samples / seconds, "samples/s"
+        elif name == "iterate_pagerank_sparse":
+            seconds = timed(iterate_pagerank_sparse, graph, DAMPING)
+            throughput, unit = pages / seconds, "pages/s"
+        else:
+            method = name[name.index("[") + 1:-1]
+            seconds = timed(solve_pagerank, graph, DAMPING, method)
+            throughput, unit = pages / seconds, "pages/s"
+
+    return {"seconds": seconds, "throughput": throughput, "unit": unit, "peak_rss": peak_memory()}
+
+
+def timed(function, *args):
+    """
+    Return the seconds a call of `function` takes.
+    """
+    start = time.perf_counter()
+    function(*args)
+    return time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    main()
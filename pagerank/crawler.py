@@ -0,0 +1,121 @@
+import multiprocessing
+import os
+import posixpath
+import re
+import sys
+import time
+from urllib.parse import urlsplit
+
+# Bytes read from an HTML file at a time
+CHUNK_SIZE = 64 * 1024
+
+# Number of files handed to a worker process at a time
+FILES_PER_TASK = 64
+
+# The href of an <a> tag, in single or double quotes
+LINK = re.compile(r"<a\s[^>]*?\bhref\s*=\s*([\"'])(.*?)\1", re.IGNORECASE | re.DOTALL)
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python crawler.py corpus [edges.tsv]")
+
+    start = time.perf_counter()
+    pages, edges = crawl_edges(sys.argv[1])
+    seconds = time.perf_counter() - start
+
+    if len(sys.argv) == 3:
+        with open(sys.argv[2], "w", encoding="utf-8") as f:
+            for source, target in edges:
+                f.write(f"{source}\t{target}\n")
+    else:
+        for source, target in edges:
+            print(f"{source}\t{target}")
+
+    print(f"Crawled {len(pages)} pages and {len(edges)} links in {seconds:.2f}s", file=sys.stderr)
+
+
+def extract_links(directory, filename, chunk_size=CHUNK_SIZE):
+    """
+    Return the page `filename` and the set of corpus pages it links to,
+    reading the file in chunks rather than all at once.
+    """
+    hrefs = []
+    with open(os.path.join(directory, filename), encoding="utf-8", errors="replace") as f:
+        carry = ""
+        while True:
+            chunk = f.read(chunk_size)
+            if not chunk:
+                hrefs.extend(match.group(2) for match in LINK.finditer(carry))
+                break
+
+            # A tag may be cut off at the end of the chunk, so keep everything
+            # from the last "<" for the next round
+            text = carry + chunk
+            cut = text.rfind("<")
+            if cut == -1:
+                cut = len(text)
+            hrefs.extend(match.group(2) for match in LINK.finditer(text, 0, cut))
+            carry = text[cut:]
+
+    links = set()
+    for href in hrefs:
+        link = resolve(filename, href)
+        if link is not None and link != filename:
+            links.add(link)
+    return filename, links
+
+
+def resolve(page, href):
+    """
+    Return the corpus path a link on `page` points to, ignoring any query
+    and #fragment, or None if it points off the corpus (another site,
+    mailto:, or above the corpus directory).
+    """
+    parts = urlsplit(href)
+    if parts.scheme or parts.netloc or not parts.path:
+        return None
+
+    path = posixpath.normpath(posixpath.join(posixpath.dirname(page), parts.path))
+    if path.startswith("../") or path == ".." or path.startswith("/"):
+        return None
+    return path
+
+
+def crawl_edges(directory, processes=None):
+    """
+    Parse a directory of HTML pages across a pool of processes.
+
+    Return the sorted list of pages, and a list of (page, linked page) edges
+    between pages of the corpus, leaving out links of a page to itself.
+    """
+    filenames = sorted(filename for filename in os.listdir(directory) if filename.endswith(".html"))
+
+    with multiprocessing.Pool(processes) as pool:
+        tasks = [(directory, filename) for filename in filenames]
+        results = pool.starmap(extract_links, tasks, chunksize=FILES_PER_TASK)
+
+    # Only include links to other pages in the corpus
+    pages = set(filenames)
+    edges = []
+    for filename, links in results:
+        edges.extend((filename, link) for link in sorted(links) if link in pages)
+
+    return filenames, edges
+
+
+def crawl_parallel(directory, processes=None):
+    """
+    Same as `crawl`, but parses the pages across a pool of processes.
+    Return a dictionary where each key is a page, and values are
+    a set of all other pages in the corpus that are linked to by the page.
+    """
+    pages, edges = crawl_edges(directory, processes)
+    corpus = {page: set() for page in pages}
+    for source, target in edges:
+        corpus[source].add(target)
+    return corpus
+
+
+if __name__ == "__main__":
+    main()
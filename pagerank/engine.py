@@ -0,0 +1,234 @@
+import sys
+
+import numpy as np
+
+from pagerank import DAMPING, SAMPLES, crawl, iterate_pagerank
+
+# Stop once the ranks change by less than this in total (L1 norm)
+TOLERANCE = 1e-10
+
+# Give up on converging after this many iterations
+MAX_ITERATIONS = 1000
+
+# Number of independent random surfers simulated side by side
+SURFERS = 10000
+
+# Surfers are split into this many groups whose estimates give the variance
+BATCHES = 10
+
+# Steps every surfer takes before its visits count; the start is forgotten at a rate of DAMPING per step
+BURN_IN = 100
+
+# Number of steps whose visits are buffered before counting them
+CHUNK = 64
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python engine.py corpus [samples]")
+    corpus = crawl(sys.argv[1])
+    samples = int(sys.argv[2]) if len(sys.argv) == 3 else SAMPLES
+
+    ranks, variances = sample_pagerank_vectorized(corpus, DAMPING, samples)
+    print(f"PageRank Results from Vectorized Sampling (n = {samples})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f} ± {variances[page] ** 0.5:.4f}")
+
+    ranks = iterate_pagerank_sparse(corpus, DAMPING)
+    print("PageRank Results from Sparse Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+    # Check against the dictionary implementation run to the same precision
+    expected = iterate_pagerank(corpus, DAMPING, tolerance=TOLERANCE)
+    difference = max(abs(ranks[page] - expected[page]) for page in corpus)
+    print(f"Largest difference from iterate_pagerank: {difference:.2e}")
+
+
+class LinkGraph():
+    """
+    Link graph in CSR layout: page `i` links to the pages
+    `indices[indptr[i]:indptr[i + 1]]`, with pages numbered by `pages`.
+    """
+
+    def __init__(self, pages, indptr, indices):
+        self.pages = pages
+        self.indptr = indptr
+        self.indices = indices
+
+    @classmethod
+    def from_corpus(cls, corpus):
+        """
+        Build a link graph from the dictionary returned by `crawl`.
+        """
+        pages = sorted(corpus)
+        index = {page: i for i, page in enumerate(pages)}
+
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        indices = []
+        for i, page in enumerate(pages):
+            links = sorted(index[link] for link in corpus[page])
+            indices.extend(links)
+            indptr[i + 1] = indptr[i] + len(links)
+
+        return cls(pages, indptr, np.array(indices, dtype=np.int32))
+
+    @classmethod
+    def from_edges(cls, pages, edges):
+        """
+        Build a link graph from a list of pages and (page, linked page) edges,
+        such as the ones returned by `crawler.crawl_edges`.
+        """
+        index = {page: i for i, page in enumerate(pages)}
+        sources = np.fromiter((index[source] for source, _ in edges), dtype=np.int32, count=len(edges))
+        targets = np.fromiter((index[target] for _, target in edges), dtype=np.int32, count=len(edges))
+
+        # Sort links by their source page to lay them out row by row
+        order = np.lexsort((targets, sources))
+        indptr = np.zeros(len(pages) + 1, dtype=np.int64)
+        np.cumsum(np.bincount(sources, minlength=len(pages)), out=indptr[1:])
+        return cls(list(pages), indptr, targets[order])
+
+    def __len__(self):
+        return len(self.pages)
+
+    def out_degrees(self):
+        """
+        Return the number of links on every page.
+        """
+        return np.diff(self.indptr)
+
+    def sources(self):
+        """
+        Return the linking page of every link, parallel to `indices`.
+        """
+        return np.repeat(np.arange(len(self), dtype=np.int32), self.out_degrees())
+
+    def to_ranks(self, vector):
+        """
+        Return a dictionary mapping page names to the values of `vector`.
+        """
+        return {page: float(value) for page, value in zip(self.pages, vector)}
+
+
+def as_link_graph(corpus):
+    """
+    Return `corpus` as a `LinkGraph`, converting a `crawl` dictionary if needed.
+    """
+    if isinstance(corpus, LinkGraph):
+        return corpus
+    # A `store.StoredCorpus` already wraps one
+    if isinstance(getattr(corpus, "graph", None), LinkGraph):
+        return corpus.graph
+    return LinkGraph.from_corpus(corpus)
+
+
+def iterate_pagerank_sparse(corpus, damping_factor, tolerance=TOLERANCE, max_iterations=MAX_ITERATIONS,
+                            start=None):
+    """
+    Return PageRank values for each page by power iteration over the sparse
+    link graph, until the ranks change by less than `tolerance` (L1 norm).
+
+    `corpus` is either the dictionary returned by `crawl` or a `LinkGraph`.
+    A page with no links is treated as linking to every page, like in
+    `iterate_pagerank`. Iteration starts from the uniform distribution, or
+    from the ranks in the `start` dictionary if given (pages missing from it
+    start at 1 / N). Return a dictionary of page names to PageRank values.
+    """
+    graph = as_link_graph(corpus)
+    n = len(graph)
+
+    out_degrees = graph.out_degrees()
+    dangling = out_degrees == 0
+    # Share of a page's rank passed along each of its links (0 for pages without links)
+    share = np.divide(1.0, out_degrees, out=np.zeros(n), where=~dangling)
+    sources = graph.sources()
+
+    if start is None:
+        ranks = np.full(n, 1 / n)
+    else:
+        ranks = np.array([start.get(page, 1 / n) for page in graph.pages])
+        ranks /= ranks.sum()
+
+    for _ in range(max_iterations):
+        # Every link carries its source's rank divided by the number of links on the source
+        spread = np.bincount(graph.indices, weights=(ranks * share)[sources], minlength=n)
+        new_ranks = (1 - damping_factor) / n + damping_factor * (spread + ranks[dangling].sum() / n)
+
+        change = np.abs(new_ranks - ranks).sum()
+        ranks = new_ranks
+        if change < tolerance:
+            break
+
+    return graph.to_ranks(ranks / ranks.sum())
+
+
+def sample_pagerank_vectorized(corpus, damping_factor, n, surfers=SURFERS, seed=None,
+                               batches=BATCHES, burn_in=BURN_IN):
+    """
+    Return PageRank values for each page by sampling `n` pages with many
+    independent random surfers moving in lockstep, each starting at random
+    and only counting visits after `burn_in` steps.
+
+    `corpus` is either the dictionary returned by `crawl` or a `LinkGraph`.
+    Return two dictionaries of page names: the estimated PageRank values,
+    and the variance of each estimate (from the spread between groups of surfers).
+    """
+    graph = as_link_graph(corpus)
+    pages = len(graph)
+    rng = np.random.default_rng(seed)
+
+    surfers = max(batches, min(surfers, n))
+    steps = -(-n // surfers)
+    out_degrees = graph.out_degrees()
+
+    # Offset every surfer's visits by its group, so one bincount counts all groups
+    group_offsets = (np.arange(surfers) % batches) * pages
+    counts = np.zeros(batches * pages, dtype=np.int64)
+
+    current = rng.integers(0, pages, size=surfers)
+    for _ in range(burn_in):
+        current = surf(graph, out_degrees, current, damping_factor, rng)
+
+    visits = np.empty((min(CHUNK, steps), surfers), dtype=np.int64)
+    filled = 0
+    for step in range(steps):
+        if step > 0:
+            current = surf(graph, out_degrees, current, damping_factor, rng)
+        visits[filled] = current + group_offsets
+        filled += 1
+        if filled == len(visits) or step == steps - 1:
+            counts += np.bincount(visits[:filled].ravel(), minlength=batches * pages)
+            filled = 0
+
+    counts = counts.reshape(batches, pages)
+    group_sizes = counts.sum(axis=1, keepdims=True)
+    ranks = counts.sum(axis=0) / group_sizes.sum()
+
+    # Each group is an independent estimate; the variance of their mean is var / batches
+    group_ranks = counts / group_sizes
+    variances = group_ranks.var(axis=0, ddof=1) / batches
+
+    return graph.to_ranks(ranks), graph.to_ranks(variances)
+
+
+def surf(graph, out_degrees, current, damping_factor, rng):
+    """
+    Move every surfer one step: with probability `damping_factor` follow a
+    random link on the current page, otherwise (or if the page has no links)
+    jump to a page chosen at random from the whole corpus.
+    """
+    degrees = out_degrees[current]
+    follow = (rng.random(len(current)) < damping_factor) & (degrees > 0)
+
+    # Links of a page are contiguous in CSR, so a uniform link is one offset away from the start
+    link = graph.indptr[current] + (rng.random(len(current)) * degrees).astype(np.int64)
+
+    # Only surfers that follow a link read one; the rest, and every surfer of a corpus without links, jump
+    jumped = rng.integers(0, len(graph), size=len(current))
+    jumped[follow] = graph.indices[link[follow]]
+    return jumped
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,143 @@
+import os
+import sys
+
+import numpy as np
+
+MODELS = ("random", "scale-free", "web")
+
+# Average number of links on a page that has any
+AVERAGE_LINKS = 8
+
+# Share of pages without links in the web model
+DANGLING = 0.2
+
+# Pages of the web model are grouped into sites of this many pages
+SITE_SIZE = 100
+
+# Share of links of the web model that stay on the page's own site
+LOCAL = 0.8
+
+# Exponent of the power law that page popularity follows in the scale-free and web models
+EXPONENT = 1.1
+
+
+def main():
+    if len(sys.argv) not in (4, 5) or sys.argv[1] not in MODELS:
+        sys.exit(f"Usage: python generate.py {'|'.join(MODELS)} pages output_directory|edges.tsv [seed]")
+    model, pages, output = sys.argv[1], int(sys.argv[2]), sys.argv[3]
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else None
+
+    sources, targets = generate_edges(model, pages, seed=seed)
+    if output.endswith(".tsv"):
+        write_edges(output, sources, targets)
+    else:
+        write_corpus(output, pages, sources, targets)
+    print(f"Generated {pages} pages and {len(sources)} links ({model}) in {output}")
+
+
+def page_name(i):
+    """
+    Return the file name of synthetic page `i`.
+    """
+    return f"{i}.html"
+
+
+def generate_edges(model, n, average_links=AVERAGE_LINKS, seed=None):
+    """
+    Return the (sources, targets) arrays of the links of a synthetic graph
+    of `n` pages, without duplicates or links of a page to itself, sorted by
+    source page.
+
+    - "random": every page links to Poisson(average_links) pages chosen uniformly
+    - "scale-free": both the number of links on a page and the popularity of
+      a page as a link target follow power laws
+    - "web": like "scale-free", but most links stay on the page's own site of
+      SITE_SIZE pages, and a DANGLING share of pages has no links at all
+    """
+    if model not in MODELS:
+        raise ValueError(f"unknown model '{model}', expected one of {', '.join(MODELS)}")
+    rng = np.random.default_rng(seed)
+
+    if model == "random":
+        out_degrees = rng.poisson(average_links, n)
+    else:
+        # Pareto with shape 1.5 has a heavy tail but a mean of 3, so scale it to the average
+        out_degrees = np.minimum((rng.pareto(1.5, n) + 1) * average_links / 3, n - 1).astype(np.int64)
+    if model == "web":
+        out_degrees[rng.random(n) < DANGLING] = 0
+
+    sources = np.repeat(np.arange(n, dtype=np.int64), out_degrees)
+    if model == "random":
+        targets = rng.integers(0, n, len(sources))
+    else:
+        targets = popular_pages(rng, n, len(sources))
+
+    if model == "web":
+        # Move local links onto the source's site, keeping their popularity rank within the site
+        local = rng.random(len(sources)) < LOCAL
+        sites = sources[local] // SITE_SIZE * SITE_SIZE
+        targets[local] = np.minimum(sites + targets[local] % SITE_SIZE, n - 1)
+
+    # Drop links of a page to itself and repeated links, sorting by source page
+    keys = np.unique(sources * n + targets)
+    sources, targets = keys // n, keys % n
+    keep = sources != targets
+    return sources[keep], targets[keep]
+
+
+def popular_pages(rng, n, size):
+    """
+    Return `size` pages drawn so that the k-th most popular page is drawn
+    with probability proportional to k ** -EXPONENT. Popularity ranks are a
+    random permutation of the pages.
+    """
+    weights = np.arange(1, n + 1, dtype=np.float64) ** -EXPONENT
+    cumulative = np.cumsum(weights)
+    ranks = np.searchsorted(cumulative, rng.random(size) * cumulative[-1], side="right")
+    ranks = np.minimum(ranks, n - 1)
+    return rng.permutation(n)[ranks]
+
+
+def write_edges(filename, sources, targets):
+    """
+    Write links as "page<TAB>linked page" lines, like `crawler.py`.
+    """
+    with open(filename, "w", encoding="utf-8") as f:
+        for source, target in zip(sources.tolist(), targets.tolist()):
+            f.write(f"{page_name(source)}\t{page_name(target)}\n")
+
+
+def write_corpus(directory, n, sources, targets):
+    """
+    Write a directory of `n` HTML pages with the given links, in the
+    format of the corpora that come with the project.
+    """
+    os.makedirs(directory, exist_ok=True)
+    starts = np.searchsorted(sources, np.arange(n + 1))
+    targets = targets.tolist()
+
+    for page in range(n):
+        links = "".join(
+            f'            <li><a href="{page_name(target)}">{target}</a></li>\n'
+            for target in targets[starts[page]:starts[page + 1]]
+        )
+        with open(os.path.join(directory, page_name(page)), "w", encoding="utf-8") as f:
+            f.write(
+                "<!DOCTYPE html>\n"
+                "<html lang=\"en\">\n"
+                "    <head>\n"
+                f"        <title>{page}</title>\n"
+                "    </head>\n"
+                "    <body>\n"
+                f"        <h1>{page}</h1>\n\n"
+                "        <div>Links:</div>\n"
+                "        <ul>\n"
+                f"{links}"
+                "        </ul>\n"
+                "    </body>\n"
+                "</html>\n"
+            )
+
+
+if __name__ == "__main__":
+    main()
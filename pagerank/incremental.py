@@ -0,0 +1,130 @@
+import json
+import os
+import sys
+import time
+
+from crawler import extract_links
+from engine import iterate_pagerank_sparse
+from pagerank import DAMPING
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python incremental.py corpus state.json")
+    directory, state = sys.argv[1], sys.argv[2]
+
+    if os.path.exists(state):
+        ranker = IncrementalPageRank.load(state, directory)
+    else:
+        ranker = IncrementalPageRank(directory)
+
+    start = time.perf_counter()
+    changes = ranker.refresh()
+    seconds = time.perf_counter() - start
+    ranker.save(state)
+
+    print(f"{len(changes)} pages changed, ranks updated in {seconds:.3f}s")
+    print("PageRank Results from Incremental Iteration")
+    for page in sorted(ranker.ranks):
+        print(f"  {page}: {ranker.ranks[page]:.4f}")
+
+
+class IncrementalPageRank():
+    """
+    Keep the link graph and ranks of a corpus directory between runs, and
+    update them for changed pages only: changed files are parsed again, and
+    power iteration restarts from the previous ranks instead of from scratch.
+    """
+
+    def __init__(self, directory, damping_factor=DAMPING):
+        self.directory = directory
+        self.damping_factor = damping_factor
+
+        # Maps every page to the (mtime_ns, size) of its file when it was parsed
+        self.files = {}
+
+        # Maps every page to all the pages it links to, including ones not (yet) in the corpus
+        self.links = {}
+
+        # Maps every page to its PageRank
+        self.ranks = {}
+
+    def corpus(self):
+        """
+        Return the current link graph in the same form as `crawl`.
+        """
+        return {
+            page: set(link for link in links if link in self.links)
+            for page, links in self.links.items()
+        }
+
+    def apply(self, changes):
+        """
+        Apply a change list and update the ranks. `changes` maps a page to the
+        set of pages it now links to, or to None if the page was removed.
+        """
+        for page, links in changes.items():
+            if links is None:
+                self.links.pop(page, None)
+            else:
+                self.links[page] = set(links) - {page}
+
+        if not self.links:
+            self.ranks = {}
+        elif changes or not self.ranks:
+            # Start from the previous ranks; new pages start at 1 / N
+            self.ranks = iterate_pagerank_sparse(self.corpus(), self.damping_factor, start=self.ranks)
+
+    def refresh(self):
+        """
+        Parse the pages whose files were added or modified since the last
+        refresh, drop the pages whose files were removed, and update the ranks.
+        Return the change list that was applied.
+        """
+        current = {}
+        for filename in os.listdir(self.directory):
+            if filename.endswith(".html"):
+                stat = os.stat(os.path.join(self.directory, filename))
+                current[filename] = (stat.st_mtime_ns, stat.st_size)
+
+        changes = {}
+        for page in self.files.keys() - current.keys():
+            changes[page] = None
+        for page, key in current.items():
+            if self.files.get(page) != key:
+                changes[page] = extract_links(self.directory, page)[1]
+
+        self.files = current
+        self.apply(changes)
+        return changes
+
+    def save(self, filename):
+        """
+        Write the link graph, file keys and ranks to a JSON file.
+        """
+        state = {
+            "damping_factor": self.damping_factor,
+            "files": self.files,
+            "links": {page: sorted(links) for page, links in self.links.items()},
+            "ranks": self.ranks
+        }
+        with open(filename, "w", encoding="utf-8") as f:
+            json.dump(state, f)
+
+    @classmethod
+    def load(cls, filename, directory):
+        """
+        Read the state written by `save` for a corpus directory.
+        """
+        with open(filename, encoding="utf-8") as f:
+            state = json.load(f)
+
+        ranker = cls(directory, state["damping_factor"])
+        ranker.files = {page: tuple(key) for page, key in state["files"].items()}
+        ranker.links = {page: set(links) for page, links in state["links"].items()}
+        ranker.ranks = state["ranks"]
+        return ranker
+
+
+if __name__ == "__main__":
+    main()
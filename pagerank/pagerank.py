@@ -127,10 +127,10 @@ def sample_pagerank(corpus, damping_factor, n):
     return pagerank
 
 
-def iterate_pagerank(corpus, damping_factor):
+def iterate_pagerank(corpus, damping_factor, tolerance=0.001):
     """
     Return PageRank values for each page by iteratively updating
-    PageRank values until convergence.
+    PageRank values until no value changes by more than `tolerance`.
 
     Return a dictionary where keys are page names, and values are
     their estimated PageRank value (a value between 0 and 1). All
@@ -143,7 +143,7 @@ def iterate_pagerank(corpus, damping_factor):
     for page in corpus:
         pagerank[page] = 1 / len(corpus)
 
-    # Keep boolean to know when the results start converging (difference no greater than 0.001)
+    # Keep boolean to know when the results start converging (difference no greater than `tolerance`)
     converged = False
     while not converged:
         # Copy pagerank
@@ -165,7 +165,7 @@ def iterate_pagerank(corpus, damping_factor):
                 # In case current page has no links to other pages
                 elif len(pages) == 0:
                     # Interpret as having one link for every page
-                    probability += 1 / len(corpus)
+                    probability += pagerank_copy[page_i] / len(corpus)
 
             # Calculate the rest of the formula given in task background for iterative algorithm
             pagerank[page] = (1 - damping_factor) / len(corpus) + (damping_factor * probability)
@@ -174,11 +174,11 @@ def iterate_pagerank(corpus, damping_factor):
             pagerank_diff[page] = abs(pagerank_copy[page] - pagerank[page])
             # print(pagerank_diff)
 
-        # Check if we can leave the while loop by making sure if there is no gap of more than 0.001 between
-        # current pagerank and previous pagerank
+        # Check if we can leave the while loop by making sure if there is no gap of more than `tolerance`
+        # between current pagerank and previous pagerank
         converged = True
         for page in pagerank_diff:
-            if pagerank_diff[page] > 0.001:
+            if pagerank_diff[page] > tolerance:
                 converged = False
 
     # Important: normalize.
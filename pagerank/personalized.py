@@ -0,0 +1,137 @@
+import sys
+
+import numpy as np
+
+from engine import MAX_ITERATIONS, TOLERANCE, as_link_graph
+from pagerank import DAMPING, crawl
+
+# Number of teleport vectors iterated together at a time. Iterating keeps about
+# six pages × BLOCK arrays of floats, on top of the links themselves
+BLOCK = 256
+
+
+def main():
+    if len(sys.argv) < 2:
+        sys.exit("Usage: python personalized.py corpus [page ...]")
+    corpus = crawl(sys.argv[1])
+    seeds = sys.argv[2:] or sorted(corpus)
+
+    for seed in seeds:
+        if seed not in corpus:
+            sys.exit(f"Page '{seed}' is not in the corpus.")
+
+    results = personalized_pagerank(corpus, DAMPING, {seed: seed for seed in seeds})
+    for seed in seeds:
+        ranks = results[seed]
+        print(f"PageRank Results Personalized to {seed}")
+        for page in sorted(ranks):
+            print(f"  {page}: {ranks[page]:.4f}")
+
+
+def personalized_pagerank(corpus, damping_factor, teleports, tolerance=TOLERANCE,
+                          max_iterations=MAX_ITERATIONS, block=BLOCK):
+    """
+    Return personalized PageRank values for many teleport distributions at once.
+
+    `teleports` maps a key (a user, a topic) to where a surfer who stops
+    following links jumps to: a single page, a collection of pages (chosen
+    uniformly), or a dictionary of page weights. `corpus` is either the
+    dictionary returned by `crawl` or a `LinkGraph`.
+
+    Return a dictionary mapping every key to a dictionary of page names to
+    PageRank values.
+    """
+    graph = as_link_graph(corpus)
+    keys = list(teleports)
+    index = {page: i for i, page in enumerate(graph.pages)}
+
+    results = {}
+    for first in range(0, len(keys), block):
+        batch = keys[first:first + block]
+        matrix = np.zeros((len(graph), len(batch)))
+        for column, key in enumerate(batch):
+            matrix[:, column] = teleport_vector(teleports[key], index)
+
+        ranks = personalized_pagerank_matrix(graph, damping_factor, matrix, tolerance, max_iterations)
+        for column, key in enumerate(batch):
+            results[key] = graph.to_ranks(ranks[:, column])
+    return results
+
+
+def teleport_vector(teleport, index):
+    """
+    Return a teleport distribution over the pages numbered by `index`, from a
+    page, a collection of pages or a dictionary of page weights.
+    """
+    vector = np.zeros(len(index))
+    if isinstance(teleport, str):
+        teleport = {teleport: 1}
+    elif not isinstance(teleport, dict):
+        teleport = {page: 1 for page in teleport}
+
+    for page, weight in teleport.items():
+        vector[index[page]] += weight
+    total = vector.sum()
+    if total <= 0:
+        raise ValueError("a teleport distribution needs a positive weight")
+    return vector / total
+
+
+def personalized_pagerank_matrix(graph, damping_factor, teleports, tolerance=TOLERANCE,
+                                 max_iterations=MAX_ITERATIONS):
+    """
+    Return the PageRank columns for a pages × k matrix of teleport
+    distributions, by block power iteration over a `LinkGraph`.
+
+    All columns share one pass over the links per iteration, and iteration
+    stops once every column changes by less than `tolerance` (L1 norm).
+    A page with no links is treated as linking to every page, like in
+    `iterate_pagerank`.
+    """
+    n = len(graph)
+    out_degrees = graph.out_degrees()
+    dangling = out_degrees == 0
+    share = np.divide(1.0, out_degrees, out=np.zeros(n), where=~dangling)
+
+    # Lay the links out by target page, so every page sums a contiguous run of rows. Links
+    # are gathered at most `n` at a time, keeping the gathered ranks to pages × k floats
+    order = np.argsort(graph.indices, kind="stable")
+    sources = graph.sources()[order]
+    weights = share[sources][:, np.newaxis]
+    link_targets = graph.indices[order]
+    chunks = []
+    for first in range(0, len(sources), max(n, 1)):
+        chunk_targets = link_targets[first:first + n]
+        starts = np.flatnonzero(np.r_[True, chunk_targets[1:] != chunk_targets[:-1]])
+        chunks.append((first, first + len(chunk_targets), chunk_targets[starts], starts))
+
+    # Iterate in place between two pages × k arrays, with no other array of that size
+    # but the teleports, their share of every iteration, and one gathered chunk of links
+    jumps = (1 - damping_factor) * teleports
+    ranks = teleports.copy()
+    new_ranks = np.empty_like(ranks)
+    for _ in range(max_iterations):
+        # A target's run may straddle two chunks, but appears once in each
+        new_ranks[:] = 0
+        for first, last, targets, starts in chunks:
+            gathered = ranks[sources[first:last]]
+            gathered *= weights[first:last]
+            new_ranks[targets] += np.add.reduceat(gathered, starts, axis=0)
+            del gathered
+        new_ranks += ranks[dangling].sum(axis=0) / n
+        new_ranks *= damping_factor
+        new_ranks += jumps
+
+        # The old ranks are not needed once the change is known, so they hold it
+        ranks -= new_ranks
+        np.abs(ranks, out=ranks)
+        change = ranks.sum(axis=0).max()
+        ranks, new_ranks = new_ranks, ranks
+        if change < tolerance:
+            break
+
+    return ranks / ranks.sum(axis=0)
+
+
+if __name__ == "__main__":
+    main()
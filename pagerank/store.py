@@ -0,0 +1,199 @@
+import mmap
+import os
+import struct
+import sys
+import time
+from bisect import bisect_left
+from collections.abc import Mapping
+
+import numpy as np
+
+from crawler import crawl_edges
+from engine import LinkGraph, iterate_pagerank_sparse, sample_pagerank_vectorized
+from pagerank import DAMPING, SAMPLES
+
+# Name of the store file written into a corpus directory by default
+STORE = "links.store"
+
+# Bump whenever the layout below changes
+VERSION = 1
+
+MAGIC = b"PRG\0"
+
+# Magic, version, byte order, pages, links
+HEADER = struct.Struct("<4sIIqq4x")
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] not in ("build", "rank") or len(sys.argv) > 4:
+        sys.exit("Usage: python store.py build corpus [store] | python store.py rank store [samples]")
+
+    if sys.argv[1] == "build":
+        directory = sys.argv[2]
+        path = sys.argv[3] if len(sys.argv) == 4 else os.path.join(directory, STORE)
+
+        start = time.perf_counter()
+        pages, edges = crawl_edges(directory)
+        write_store(LinkGraph.from_edges(pages, edges), path)
+        seconds = time.perf_counter() - start
+        print(f"Stored {len(pages)} pages and {len(edges)} links in {path} ({seconds:.2f}s)")
+        return
+
+    start = time.perf_counter()
+    graph = load_store(sys.argv[2])
+    print(f"Loaded {len(graph)} pages and {len(graph.indices)} links in {time.perf_counter() - start:.4f}s")
+    samples = int(sys.argv[3]) if len(sys.argv) == 4 else SAMPLES
+
+    ranks, variances = sample_pagerank_vectorized(graph, DAMPING, samples)
+    print(f"PageRank Results from Vectorized Sampling (n = {samples})")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f} ± {variances[page] ** 0.5:.4f}")
+
+    ranks = iterate_pagerank_sparse(graph, DAMPING)
+    print("PageRank Results from Sparse Iteration")
+    for page in sorted(ranks):
+        print(f"  {page}: {ranks[page]:.4f}")
+
+
+def write_store(graph, path):
+    """
+    Write a `LinkGraph` whose pages are in sorted order to `path`.
+    """
+    if any(graph.pages[i] > graph.pages[i + 1] for i in range(len(graph) - 1)):
+        raise ValueError("pages of a stored link graph must be sorted")
+
+    # Write to a temporary file first so readers never see half a store
+    temporary = f"{path}.{os.getpid()}.tmp"
+    with open(temporary, "wb") as f:
+        f.write(HEADER.pack(MAGIC, VERSION, byte_order(), len(graph), len(graph.indices)))
+        write_array(f, np.asarray(graph.indptr, dtype=np.int64))
+        write_array(f, np.asarray(graph.indices, dtype=np.int32))
+
+        encoded = [page.encode("utf-8") for page in graph.pages]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(data) for data in encoded], out=offsets[1:])
+        write_array(f, offsets)
+        write_array(f, np.frombuffer(b"".join(encoded), dtype=np.uint8))
+    os.replace(temporary, path)
+
+
+def load_store(path):
+    """
+    Memory-map the store at `path` and return its `LinkGraph`.
+
+    Nothing is parsed or copied up front: the CSR arrays are views of the
+    file, and page names are decoded when they are asked for.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+
+    if len(buffer) < HEADER.size:
+        raise ValueError(f"{path} is not a link graph store")
+    magic, version, order, pages, links = HEADER.unpack_from(buffer)
+    if magic != MAGIC:
+        raise ValueError(f"{path} is not a link graph store")
+    if (version, order) != (VERSION, byte_order()):
+        raise ValueError(f"{path} was written by another version or machine, build it again")
+
+    offset = HEADER.size
+    indptr, offset = read_array(buffer, offset, np.int64, pages + 1)
+    indices, offset = read_array(buffer, offset, np.int32, links)
+    name_offsets, offset = read_array(buffer, offset, np.int64, pages + 1)
+    blob, offset = read_array(buffer, offset, np.uint8, int(name_offsets[-1]))
+    return LinkGraph(PageTable(name_offsets, memoryview(blob)), indptr, indices)
+
+
+def load_corpus(path):
+    """
+    Return the store at `path` as a read-only dictionary of the same form
+    as `crawl`, for `sample_pagerank` and `iterate_pagerank`.
+    """
+    return StoredCorpus(load_store(path))
+
+
+def byte_order():
+    """
+    Return 1 on little-endian machines and 2 on big-endian ones.
+    """
+    return 1 if sys.byteorder == "little" else 2
+
+
+def write_array(f, values):
+    """
+    Write a NumPy array, padded to a multiple of 8 bytes.
+    """
+    data = values.tobytes()
+    f.write(data)
+    f.write(b"\0" * (-len(data) % 8))
+
+
+def read_array(buffer, offset, dtype, length):
+    """
+    Return a zero-copy NumPy view of `length` values at `offset`, and the offset after it.
+    """
+    size = length * np.dtype(dtype).itemsize
+    values = np.frombuffer(buffer, dtype=dtype, count=length, offset=offset)
+    return values, offset + size + (-size % 8)
+
+
+class PageTable():
+    """
+    Read-only sorted sequence of page names decoded from a store on demand.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if i < 0:
+            i += len(self)
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
+    def index(self, page):
+        """
+        Return the number of `page`, found by bisection, or raise KeyError.
+        """
+        i = bisect_left(self, page)
+        if i < len(self) and self[i] == page:
+            return i
+        raise KeyError(page)
+
+
+class StoredCorpus(Mapping):
+    """
+    Read-only view of a stored `LinkGraph` as a dictionary mapping each page
+    to the set of pages it links to.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, page):
+        graph = self.graph
+        i = graph.pages.index(page)
+        return set(graph.pages[j] for j in graph.indices[graph.indptr[i]:graph.indptr[i + 1]])
+
+    def __iter__(self):
+        return iter(self.graph.pages)
+
+    def __len__(self):
+        return len(self.graph)
+
+    def __contains__(self, page):
+        try:
+            self.graph.pages.index(page)
+        except KeyError:
+            return False
+        return True
+
+
+if __name__ == "__main__":
+    main()
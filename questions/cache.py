@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+
+# Directory of cached tokens inside a corpus directory
+TOKENS = ".tokens"
+
+# Bump whenever tokenizing changes so old tokens are ignored
+VERSION = 1
+
+
+def content_hash(contents):
+    """
+    Return the SHA-256 hex digest of a file's contents, which names its cached tokens.
+    """
+    return hashlib.sha256(contents.encode("utf-8")).hexdigest()
+
+
+def read_tokens(directory, digest):
+    """
+    Return the cached tokens of the contents with this digest, or None.
+    """
+    try:
+        with open(os.path.join(directory, TOKENS, f"{digest}.json"), encoding="utf-8") as f:
+            data = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if data.get("version") != VERSION:
+        return None
+    return data["tokens"]
+
+
+def write_tokens(directory, digest, tokens):
+    """
+    Cache the tokens of the contents with this digest.
+    """
+    path = os.path.join(directory, TOKENS)
+    try:
+        os.makedirs(path, exist_ok=True)
+
+        # Write to a temporary file first so readers never see half an entry
+        temporary = os.path.join(path, f"{digest}.{os.getpid()}.tmp")
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump({"version": VERSION, "tokens": tokens}, f)
+        os.replace(temporary, os.path.join(path, f"{digest}.json"))
+    except OSError:
+        # A read-only corpus only costs us the cache
+        pass
+
+
+def prune_tokens(directory, digests):
+    """
+    Remove cached tokens of contents that are no longer in the corpus.
+    """
+    path = os.path.join(directory, TOKENS)
+    if not os.path.isdir(path):
+        return
+    for filename in os.listdir(path):
+        if filename.endswith(".json") and filename[:-len(".json")] not in digests:
+            try:
+                os.remove(os.path.join(path, filename))
+            except OSError:
+                pass
@@ -0,0 +1,127 @@
+import json
+import os
+
+# Name of the index file written into a corpus directory
+INDEX = ".index.json"
+
+# Bump whenever the layout below changes so old indexes are rebuilt
+VERSION = 1
+
+
+class InvertedIndex():
+    """
+    Inverted index of a corpus: for every word, the files it appears in with
+    the number of times it appears in each (`postings`), and its IDF across
+    files (`idfs`). Files are numbered by their position in `files`.
+    """
+
+    def __init__(self, files, postings, idfs):
+        self.files = files
+        self.postings = postings
+        self.idfs = idfs
+
+    @classmethod
+    def build(cls, file_words, idfs):
+        """
+        Build an index from a dictionary mapping filenames to their list of
+        words, and the IDF of every word.
+        """
+        files = list(file_words)
+        postings = {}
+        for number, filename in enumerate(files):
+            counts = {}
+            for word in file_words[filename]:
+                counts[word] = counts.get(word, 0) + 1
+            for word, count in counts.items():
+                postings.setdefault(word, []).append((number, count))
+        return cls(files, postings, dict(idfs))
+
+    def top_files(self, query, n):
+        """
+        Return the filenames of the `n` top files that match the `query`
+        (a set of words), ranked the same way as `questions.top_files`,
+        reading only the postings of the query's words.
+        """
+        tf_idfs = {}
+        for q in query:
+            for number, count in self.postings.get(q, ()):
+                tf_idfs[number] = tf_idfs.get(number, 0) + self.idfs[q] * count
+
+        # Files without a match are left out, and ties keep the files' order
+        ranked = sorted(
+            (tf_idf, number) for number, tf_idf in tf_idfs.items() if tf_idf != 0
+        )
+        return [self.files[number] for _, number in ranked[:n]]
+
+    def save(self, path, key):
+        """
+        Write the index to `path` as JSON, tagged with the corpus `key`.
+        """
+        data = {
+            "version": VERSION,
+            "key": key,
+            "files": self.files,
+            "postings": self.postings,
+            "idfs": self.idfs
+        }
+
+        # Write to a temporary file first so readers never see half an index
+        temporary = f"{path}.{os.getpid()}.tmp"
+        with open(temporary, "w", encoding="utf-8") as f:
+            json.dump(data, f)
+        os.replace(temporary, path)
+
+    @classmethod
+    def load(cls, path, key):
+        """
+        Read the index at `path`. Returns None if there is no index, or if it
+        was written by another version or for a different corpus `key`.
+        """
+        try:
+            with open(path, encoding="utf-8") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return None
+
+        if data.get("version") != VERSION or data.get("key") != key:
+            return None
+        postings = {
+            word: [tuple(posting) for posting in word_postings]
+            for word, word_postings in data["postings"].items()
+        }
+        return cls(data["files"], postings, data["idfs"])
+
+
+def corpus_key(directory):
+    """
+    Return the filename, modification time and size of every `.txt` file in
+    `directory`, in the order `questions.load_files` reads them.
+    """
+    key = []
+    for filename in os.listdir(directory):
+        if filename.endswith(".txt"):
+            stat = os.stat(os.path.join(directory, filename))
+            key.append([filename, stat.st_mtime_ns, stat.st_size])
+    return key
+
+
+def load_index(directory, build):
+    """
+    Return the `InvertedIndex` of a corpus directory.
+
+    The index is read from the directory as long as its files keep the same
+    names, modification times and sizes. Otherwise `build()` is called to
+    index the corpus again, and the new index is written for the next run.
+    """
+    path = os.path.join(directory, INDEX)
+    key = corpus_key(directory)
+
+    index = InvertedIndex.load(path, key)
+    if index is None:
+        index = build()
+        try:
+            index.save(path, key)
+        except OSError:
+            # A read-only corpus only costs us the cache
+            pass
+    return index
@@ -3,10 +3,20 @@ import sys
 import os
 import string
 import math
+import multiprocessing
+
+from cache import content_hash, prune_tokens, read_tokens, write_tokens
+from index import InvertedIndex, load_index
 
 FILE_MATCHES = 1
 SENTENCE_MATCHES = 1
 
+# English stopwords, loaded from NLTK on first use
+STOPWORDS = None
+
+# Punctuation characters, which are tokens of their own
+PUNCTUATION = set(string.punctuation)
+
 
 def main():
 
@@ -14,28 +24,26 @@ def main():
     if len(sys.argv) != 2:
         sys.exit("Usage: python questions.py corpus")
 
-    # Calculate IDF values across files
-    files = load_files(sys.argv[1])
-    file_words = {
-        filename: tokenize(files[filename])
-        for filename in files
-    }
-    file_idfs = compute_idfs(file_words)
+    # Calculate IDF values across files, or read them from the index of an earlier run
+    directory = sys.argv[1]
+    index = load_index(directory, lambda: build_index(directory))
 
     # Prompt user for query
     query = set(tokenize(input("Query: ")))
 
-    # Determine top file matches according to TF-IDF
-    filenames = top_files(query, file_words, file_idfs, n=FILE_MATCHES)
+    # Determine top file matches according to TF-IDF, from the postings of the query's words
+    filenames = index.top_files(query, n=FILE_MATCHES)
+    files = {
+        filename: read_file(os.path.join(directory, filename))
+        for filename in filenames
+    }
 
-    # Extract sentences from top files
+    # Extract sentences from top files, tokenized by an earlier run if their contents are unchanged
+    file_tokens = tokenize_files(directory, files)
     sentences = dict()
     for filename in filenames:
-        for passage in files[filename].split("\n"):
-            for sentence in nltk.sent_tokenize(passage):
-                tokens = tokenize(sentence)
-                if tokens:
-                    sentences[sentence] = tokens
+        for sentence, tokens in file_tokens[filename]["sentences"]:
+            sentences[sentence] = tokens
 
     # Compute IDF values across sentences
     idfs = compute_idfs(sentences)
@@ -53,12 +61,83 @@ def load_files(directory):
     """
     file_content = dict()
     for filename in os.listdir(directory):
-        file = open(os.path.join(directory, filename), "r")
-        file_content[filename] = file.read()
+        if filename.endswith(".txt"):
+            file_content[filename] = read_file(os.path.join(directory, filename))
 
     return file_content
 
 
+def read_file(path):
+    """
+    Return the contents of a file as a string.
+    """
+    with open(path, "r") as file:
+        return file.read()
+
+
+def build_index(directory):
+    """
+    Tokenize every file of a corpus directory and return its `InvertedIndex`.
+    """
+    files = load_files(directory)
+    file_tokens = tokenize_files(directory, files)
+    file_words = {
+        filename: file_tokens[filename]["words"]
+        for filename in files
+    }
+    file_idfs = compute_idfs(file_words)
+
+    # Tokens of contents no longer in the corpus won't be asked for again
+    prune_tokens(directory, {content_hash(files[filename]) for filename in files})
+    return InvertedIndex.build(file_words, file_idfs)
+
+
+def tokenize_files(directory, files):
+    """
+    Given a dictionary mapping filenames of a corpus directory to their
+    contents, return a dictionary mapping each filename to the tokens of
+    `tokenize_document`.
+
+    Tokens are cached in the corpus directory by a hash of the contents, so
+    only new or changed files are tokenized, across a pool of processes.
+    """
+    file_tokens = dict()
+    digests = dict()
+    for filename in files:
+        digests[filename] = content_hash(files[filename])
+        tokens = read_tokens(directory, digests[filename])
+        if tokens is not None:
+            file_tokens[filename] = tokens
+
+    missing = [filename for filename in files if filename not in file_tokens]
+    if len(missing) > 1:
+        with multiprocessing.Pool() as pool:
+            results = pool.map(tokenize_document, [files[filename] for filename in missing])
+    else:
+        results = [tokenize_document(files[filename]) for filename in missing]
+
+    for filename, tokens in zip(missing, results):
+        write_tokens(directory, digests[filename], tokens)
+        file_tokens[filename] = tokens
+
+    return file_tokens
+
+
+def tokenize_document(document):
+    """
+    Return the tokens of a document: its "words" (see `tokenize`), and its
+    "sentences", a list of [sentence, words] pairs for every sentence with any
+    words left, in the order `main` reads them.
+    """
+    sentences = []
+    for passage in document.split("\n"):
+        for sentence in nltk.sent_tokenize(passage):
+            tokens = tokenize(sentence)
+            if tokens:
+                sentences.append([sentence, tokens])
+    return {"words": tokenize(document), "sentences": sentences}
+
+
 def tokenize(document):
     """
     Given a document (represented as a string), return a list of all of the
@@ -67,24 +146,14 @@ def tokenize(document):
     Process document by converting all words to lowercase, and removing any
     punctuation or English stopwords.
     """
-    words = nltk.word_tokenize(document.lower())                # Tokenize all words in the document and lowercase
+    global STOPWORDS
+    if STOPWORDS is None:
+        STOPWORDS = set(nltk.corpus.stopwords.words('english'))
 
-    stopwords = set(nltk.corpus.stopwords.words('english'))     # Initialize a set with all stop words
-    punctuation = set(string.punctuation)                       # Initialize a set with all punctuation
-    to_be_removed = set()                                       # A set to store all words that need to be removed
-
-    n = len(words)
-
-    # Go over all words in the list and add those than need to be removed to the set
-    for i in range(0, n):
-        word = words[i]
-
-        # If word is a stop word or punctuation, it should be removed
-        if word in stopwords or word in punctuation:
-            to_be_removed.add(word)
+    words = nltk.word_tokenize(document.lower())                # Tokenize all words in the document and lowercase
 
-    # return a list of words that are not meant to be removed
-    return [word for word in words if word not in to_be_removed]
+    # return a list of words that are neither stop words nor punctuation
+    return [word for word in words if word not in STOPWORDS and word not in PUNCTUATION]
 
 
 def compute_idfs(documents):